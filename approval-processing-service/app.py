@@ -1,142 +1,506 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, redirect
 import grpc
 from concurrent import futures
+import asyncio
 import threading
 import sys
 import os
+import math
+import uuid
 
 # Proto 파일 경로 설정 (환경에 맞게 수정)
 sys.path.append(os.path.abspath("../proto"))
+sys.path.append(os.path.abspath("../common"))
 import approval_pb2
 import approval_pb2_grpc
+from grpc_channel import GrpcChannelManager, SERVER_KEEPALIVE_OPTIONS
+from grpc_stream import StreamLimiter, AckedStream, StreamUnsupported, serve_acked_stream, serve_acked_stream_async
+from approver_queue import ApproverQueue
+from queue_journal import QueueJournal
+from result_delivery import ResultDelivery
+from ttl_cache import TTLCache
+from sharding import HashRing, load_processing_shards
 
 app = Flask(__name__)
 
+# --- [설정] 샤드 ---
+# 여러 프로세스로 나눠 실행할 때: PROCESSING_SHARDS(전체 목록)와 PROCESSING_SHARD_INDEX(내 번호) 지정
+# 예) PROCESSING_SHARDS="localhost:50051=http://localhost:5003,localhost:50061=http://localhost:5013"
+#     PROCESSING_SHARD_INDEX=1 python app.py  -> gRPC 50061, REST 5013
+# 각 샤드는 approverId를 consistent hashing한 구간의 대기 목록만 보관
+SHARDS = load_processing_shards()
+SHARD_INDEX = int(os.environ.get("PROCESSING_SHARD_INDEX", "0"))
+if not 0 <= SHARD_INDEX < len(SHARDS):
+    raise SystemExit(f"PROCESSING_SHARD_INDEX must be between 0 and {len(SHARDS) - 1}")
+MY_SHARD = SHARDS[SHARD_INDEX]
+shard_ring = HashRing(SHARDS)
+
 # --- [설정] 포트 관리 ---
-# 내(Processing Service)가 실행될 gRPC 포트
-MY_GRPC_PORT = 50051 
+# 내(Processing Service)가 실행될 gRPC 포트 / REST 포트 (샤드 목록의 내 항목 기준, 기본 50051 / 5003)
+MY_GRPC_PORT = int(MY_SHARD.grpc_target.rsplit(":", 1)[1])
+MY_HTTP_PORT = int(MY_SHARD.http_url.rsplit(":", 1)[1])
 # 결과 회신을 보낼 Request Service의 gRPC 포트
 REQUEST_SERVICE_GRPC_PORT = 50052 
+GRPC_CALL_TIMEOUT = 5  # gRPC 호출 타임아웃 (초)
+# gRPC 서버 방식: thread(스레드 풀) / aio(grpc.aio 이벤트 루프, 동시 처리 수 제한 없음)
+GRPC_SERVER_MODE = os.environ.get("GRPC_SERVER_MODE", "thread")
+# thread 모드: 장기 스트림은 열려 있는 동안 워커 스레드 하나를 계속 점유하므로
+# 스트림은 GRPC_MAX_STREAMS개까지만 받고(초과 시 RESOURCE_EXHAUSTED -> 상대는 단건 RPC 사용)
+# Request Service 프로세스마다 요청 스트림(StreamApprovalRequests)이 하나씩 열리므로 프로세스 수보다 크게 설정
+# 워커 스레드는 그 위에 단건 RPC용 GRPC_UNARY_WORKERS개를 더 둬서 스트림이 단건 RPC를 막지 않게 함
+GRPC_MAX_STREAMS = int(os.environ.get("GRPC_MAX_STREAMS", "32"))
+GRPC_UNARY_WORKERS = 10
+
+# Request Service로 가는 채널은 요청마다 새로 만들지 않고 프로세스 전체에서 공유
+request_channels = GrpcChannelManager(approval_pb2_grpc.ApprovalStub)
+# thread 모드 gRPC 서버의 장기 스트림 수 제한 (GRPC_MAX_STREAMS 참고)
+stream_limiter = StreamLimiter(GRPC_MAX_STREAMS)
+
+# 결과 회신은 장기 유지 스트림(StreamApprovalResults)으로 전송, 미지원 서버면 단건 RPC 사용
+result_stream = AckedStream(
+    request_channels.get(f'localhost:{REQUEST_SERVICE_GRPC_PORT}'),
+    'StreamApprovalResults',
+    lambda seq, result: approval_pb2.ApprovalResultEnvelope(seq=seq, result=result)
+)
 
 # In-Memory 저장소
-# 구조: { "approverId_String": [ {request_data}, ... ] }
-approval_queue = {}
+# 구조: { "approverId_String": OrderedDict(requestId -> (seq, {request_data})) } (approver_queue.py 참고)
+approval_queue = ApproverQueue()
+
+# 결재 본문 캐시 { requestId: {requestId, requesterId, title, content, steps} }
+# 다음 단계부터는 Request Service가 본문 없이 AdvanceApproval(단계 번호)만 보내고, 캐시에 없으면 전체 재전송
+APPROVAL_CACHE_SIZE = 20000
+APPROVAL_CACHE_TTL = 24 * 3600  # 초
+approval_cache = TTLCache(max_size=APPROVAL_CACHE_SIZE, ttl=APPROVAL_CACHE_TTL)
+
+# 대기 목록 영속화 (WAL + 스냅샷), 재시작 시 QUEUE_DATA_DIR에서 복구
+# 샤드가 여러 개면 샤드별 디렉터리 사용
+QUEUE_DATA_DIR = os.path.abspath(os.environ.get(
+    "QUEUE_DATA_DIR", "./data" if len(SHARDS) == 1 else f"./data/shard-{SHARD_INDEX}"))
+journal = QueueJournal(QUEUE_DATA_DIR)
 
 # --- [기능 1] gRPC Server: RequestApproval 처리 ---
+# -- Helper: 이 샤드가 담당하는 결재자인지 확인 --
+def owns_approver(approver_id):
+    return shard_ring.index_for(approver_id) == SHARD_INDEX
+
+# 가이드 3.3.2: RequestApproval 호출 수신 시 처리 흐름 (단건/스트림 공용)
+def enqueue_approval_request(request):
+    print(f"[gRPC Server] Received Approval Request: ID {request.requestId}")
+    
+    # 1. steps 중 첫 번째 pending 상태인 approver 찾기 [cite: 117]
+    target_approver = None
+    current_step_num = 0
+    
+    # 데이터 저장을 위해 gRPC 객체를 dict 리스트로 변환
+    steps_list = []
+    for step in request.steps:
+        steps_list.append({
+            "step": step.step,
+            "approverId": step.approverId,
+            "status": step.status
+        })
+        # 아직 타겟을 못 찾았고, 현재 스텝이 pending이면 타겟으로 설정
+        if target_approver is None and step.status == "pending":
+            target_approver = str(step.approverId)
+            current_step_num = step.step
+
+    body = {
+        "requestId": request.requestId,
+        "requesterId": request.requesterId,
+        "title": request.title,
+        "content": request.content, # 내용 포함
+        "steps": steps_list
+    }
+    return queue_for_approver(target_approver, current_step_num, body)
+
+# AdvanceApproval 수신: 캐시된 본문으로 다음 단계 결재자 대기 목록에 저장
+def advance_approval_request(request):
+    print(f"[gRPC Server] Received Advance Request: ID {request.requestId} -> Step {request.step}")
+
+    body = approval_cache.get(request.requestId)
+    if body is None:
+        return "cache_miss"
+
+    # 이전 단계는 모두 승인된 상태로 갱신 (순차 진행이므로 승인되어야 다음 단계로 넘어옴)
+    steps_list = [
+        dict(s, status="approved") if s['step'] < request.step else s
+        for s in body['steps']
+    ]
+    target = next((s for s in steps_list if s['step'] == request.step), None)
+    if target is None or target['approverId'] != request.approverId or target['status'] != "pending":
+        # 캐시 내용과 맞지 않으면 전체 전송으로 다시 받음
+        return "cache_miss"
+
+    return queue_for_approver(str(request.approverId), request.step, dict(body, steps=steps_list))
+
+# -- Helper: 결재자 대기 목록에 저장 + 본문 캐시 (전체 요청 / 단계 진행 공용) --
+def queue_for_approver(target_approver, current_step_num, body):
+    # 샤드 설정이 서로 다르면 저장하지 않고 거절 (Request Service가 재시도)
+    if target_approver and not owns_approver(target_approver):
+        print(f"[gRPC Server] Approver {target_approver} is not owned by shard {SHARD_INDEX}. Rejected.")
+        return "wrong_shard"
+
+    # 2. 해당 approverId를 키로 하는 인메모리 대기 리스트에 저장 [cite: 118]
+    if target_approver:
+        # 가이드 3.3.1 예시에 맞춘 상세 데이터 저장 (currentStep은 처리를 위해 편의상 저장)
+        req_data = dict(body, currentStep=current_step_num)
+        # 같은 요청이 재전송되어도 중복 저장되지 않음
+        approval_queue.add(target_approver, req_data)
+        # 다음 단계는 AdvanceApproval로 받을 수 있도록 본문 캐시
+        approval_cache.set(body['requestId'], body)
+        print(f"[gRPC Server] Added to Approver {target_approver}'s queue (Step {current_step_num})")
+
+    # 3. 응답 반환 [cite: 118]
+    return "received"
+
 class ApprovalServicer(approval_pb2_grpc.ApprovalServicer):
-    # 가이드 3.3.2: RequestApproval 호출 수신 시 처리 흐름
     def RequestApproval(self, request, context):
-        print(f"[gRPC Server] Received Approval Request: ID {request.requestId}")
-        
-        # 1. steps 중 첫 번째 pending 상태인 approver 찾기 [cite: 117]
-        target_approver = None
-        current_step_num = 0
-        
-        # 데이터 저장을 위해 gRPC 객체를 dict 리스트로 변환
-        steps_list = []
-        for step in request.steps:
-            steps_list.append({
-                "step": step.step,
-                "approverId": step.approverId,
-                "status": step.status
-            })
-            # 아직 타겟을 못 찾았고, 현재 스텝이 pending이면 타겟으로 설정
-            if target_approver is None and step.status == "pending":
-                target_approver = str(step.approverId)
-                current_step_num = step.step
-        
-        # 2. 해당 approverId를 키로 하는 인메모리 대기 리스트에 저장 [cite: 118]
-        if target_approver:
-            if target_approver not in approval_queue:
-                approval_queue[target_approver] = []
-            
-            # 가이드 3.3.1 예시에 맞춘 상세 데이터 저장
-            req_data = {
-                "requestId": request.requestId,
-                "requesterId": request.requesterId,
-                "title": request.title,
-                "content": request.content, # 내용 포함
-                "steps": steps_list,
-                "currentStep": current_step_num # 처리를 위해 편의상 저장
-            }
-            approval_queue[target_approver].append(req_data)
-            print(f"[gRPC Server] Added to Approver {target_approver}'s queue (Step {current_step_num})")
-
-        # 3. 응답 반환 [cite: 118]
-        return approval_pb2.ApprovalResponse(status="received")
+        return approval_pb2.ApprovalResponse(status=enqueue_approval_request(request))
+
+    # Request Service의 장기 유지 스트림: 메시지마다 대기열에 저장하고 seq별 ack 반환
+    def StreamApprovalRequests(self, request_iterator, context):
+        return stream_limiter.guard(context, serve_acked_stream(
+            request_iterator,
+            lambda envelope: enqueue_approval_request(envelope.request),
+            lambda seq, status: approval_pb2.StreamAck(seq=seq, status=status)
+        ))
     
+    def AdvanceApproval(self, request, context):
+        return approval_pb2.ApprovalResponse(status=advance_approval_request(request))
+
     # (필수 구현) Interface 충족을 위해 빈 메서드 정의
     def ReturnApprovalResult(self, request, context):
         return approval_pb2.ApprovalResultResponse(status="ok")
 
+# grpc.aio 서버용 (GRPC_SERVER_MODE=aio)
+# 대기열 저장은 WAL 기록(파일 write/flush + journal lock, checkpoint 중에는 fsync 대기)을 포함하므로
+# 이벤트 루프를 막지 않도록 asyncio.to_thread로 기본 스레드 풀에서 실행
+class AsyncApprovalServicer(approval_pb2_grpc.ApprovalServicer):
+    async def RequestApproval(self, request, context):
+        return approval_pb2.ApprovalResponse(status=await asyncio.to_thread(enqueue_approval_request, request))
+
+    async def StreamApprovalRequests(self, request_iterator, context):
+        async def handle(envelope):
+            return await asyncio.to_thread(enqueue_approval_request, envelope.request)
+
+        async for ack in serve_acked_stream_async(
+            request_iterator, handle, lambda seq, status: approval_pb2.StreamAck(seq=seq, status=status)
+        ):
+            yield ack
+
+    async def AdvanceApproval(self, request, context):
+        return approval_pb2.ApprovalResponse(status=await asyncio.to_thread(advance_approval_request, request))
+
+    async def ReturnApprovalResult(self, request, context):
+        return approval_pb2.ApprovalResultResponse(status="ok")
+
 # --- [기능 2] REST API: 결재 처리 (승인/반려) ---
+# 다른 샤드가 담당하는 결재자의 요청은 담당 샤드로 307 redirect (메서드/본문 유지)
+@app.before_request
+def redirect_to_owner_shard():
+    approver_id = (request.view_args or {}).get('approver_id')
+    if approver_id is None or owns_approver(approver_id):
+        return None
+    owner = shard_ring.shard_for(approver_id)
+    return redirect(owner.http_url + request.full_path.rstrip('?'), code=307)
+
+# 대기 목록 조회 페이지 크기
+DEFAULT_QUEUE_PAGE_SIZE = 100
+MAX_QUEUE_PAGE_SIZE = 500
+# view=summary 일 때 반환할 필드 (content, steps 제외)
+QUEUE_SUMMARY_FIELDS = ("requestId", "title", "requesterId", "currentStep")
+# 대기 목록 version은 재기동 시 0부터 다시 시작하므로 ETag에 기동 시점 구분값을 포함
+QUEUE_ETAG_EPOCH = uuid.uuid4().hex[:8]
+
+# -- Helper: 대기 목록 페이지의 ETag (같은 version + 같은 조회 조건이면 같은 응답) --
+def queue_etag(version, view, limit, cursor):
+    return f"{QUEUE_ETAG_EPOCH}-{version}-{view}-{limit}-{cursor}"
+
 @app.route('/process/<approver_id>', methods=['GET'])
 def get_queue(approver_id):
     # 가이드 3.3.3: 대기 목록 조회
-    return jsonify(approval_queue.get(approver_id, []))
+    # Query: ?limit=100&cursor=<X-Next-Cursor 값>&view=summary
+    # 다음 페이지가 있으면 X-Next-Cursor 헤더로 cursor 반환, 변경이 없으면 304 (If-None-Match)
+    try:
+        limit = int(request.args.get('limit', DEFAULT_QUEUE_PAGE_SIZE))
+        cursor = int(request.args.get('cursor', 0))
+    except ValueError:
+        return jsonify({"message": "'limit' and 'cursor' must be integers"}), 400
+    if not 1 <= limit <= MAX_QUEUE_PAGE_SIZE:
+        return jsonify({"message": f"'limit' must be between 1 and {MAX_QUEUE_PAGE_SIZE}"}), 400
+    if cursor < 0:
+        return jsonify({"message": "'cursor' must not be negative"}), 400
+    view = request.args.get('view', 'full')
+    if view not in ('full', 'summary'):
+        return jsonify({"message": "'view' must be 'full' or 'summary'"}), 400
+
+    # 목록을 만들기 전에 version만으로 변경 여부 확인
+    etag = queue_etag(approval_queue.version(approver_id), view, limit, cursor)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    items, next_cursor, version = approval_queue.page(approver_id, after=cursor, limit=limit)
+    if view == 'summary':
+        items = [{field: item.get(field) for field in QUEUE_SUMMARY_FIELDS} for item in items]
+
+    response = jsonify(items)
+    response.set_etag(queue_etag(version, view, limit, cursor), weak=True)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
+
+# --- [기능 2-1] REST API: 대기 목록 변경 대기 (long-poll) ---
+# 클라이언트는 목록을 반복 조회하지 않고 이 요청으로 대기하다가 변경되면 목록을 다시 조회
+DEFAULT_LONG_POLL_TIMEOUT = 30
+MAX_LONG_POLL_TIMEOUT = 60
+# 대기 중인 요청은 요청 스레드를 하나씩 점유하므로 프로세스당 동시 대기 수 제한 (초과 시 503 + Retry-After)
+MAX_LONG_POLL_WAITERS = 256
+LONG_POLL_RETRY_AFTER = 5  # 초
+long_poll_slots = threading.BoundedSemaphore(MAX_LONG_POLL_WAITERS)
+
+# -- Helper: 클라이언트에 전달하는 version 토큰 (재기동 후 version이 겹치지 않도록 epoch 포함) --
+def inbox_version_token(version):
+    return f"{QUEUE_ETAG_EPOCH}.{version}"
+
+@app.route('/process/<approver_id>/changes', methods=['GET'])
+def wait_queue_changes(approver_id):
+    # Query: ?since=<직전 응답의 version>&timeout=30
+    # Response: {"version": "...", "changed": true/false, "pending": 대기 건수}
+    # since가 없거나 다른 프로세스에서 받은 토큰이면 기다리지 않고 바로 현재 version 반환
+    try:
+        timeout = float(request.args.get('timeout', DEFAULT_LONG_POLL_TIMEOUT))
+    except ValueError:
+        return jsonify({"message": "'timeout' must be a number"}), 400
+    if not math.isfinite(timeout):  # nan / inf는 Condition 대기가 끝나지 않음
+        return jsonify({"message": "'timeout' must be a finite number"}), 400
+    timeout = min(max(timeout, 0), MAX_LONG_POLL_TIMEOUT)
+
+    epoch, _, since = request.args.get('since', '').partition('.')
+    since = int(since) if epoch == QUEUE_ETAG_EPOCH and since.isdigit() else None
+
+    if not long_poll_slots.acquire(blocking=False):
+        response = jsonify({"message": "Too many waiting requests. Please retry."})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(LONG_POLL_RETRY_AFTER)
+        return response
+    try:
+        # 대기 중에는 스레드만 Condition에서 잠들어 있고 CPU/응답 생성 비용은 없음
+        version = approval_queue.wait_for_change(approver_id, since, timeout)
+    finally:
+        long_poll_slots.release()
+    return jsonify({
+        "version": inbox_version_token(version),
+        "changed": version != since,
+        "pending": approval_queue.size(approver_id)
+    })
+
+# -- Helper: 다음 단계가 없는 요청(반려 / 마지막 단계)은 본문 캐시에서 제거 --
+def release_cached_body(item, status):
+    if status == "rejected" or all(s['step'] <= item['currentStep'] for s in item['steps']):
+        approval_cache.invalidate(item['requestId'])
+
+DECISION_STATUSES = ("approved", "rejected")
 
 @app.route('/process/<approver_id>/<int:request_id>', methods=['POST'])
 def process_approval(approver_id, request_id):
     # 가이드 3.3.3: 승인 또는 반려 처리
     # Request: {"status": "approved"} or {"status": "rejected"}
-    data = request.json 
+    # 결정은 로컬(WAL)에 기록 후 바로 202 응답, Request Service 전달은 result_delivery가 백그라운드로 처리
+    data = request.json or {}
     status = data.get("status")
+    if status not in DECISION_STATUSES:
+        return jsonify({"message": "'status' must be 'approved' or 'rejected'"}), 400
     
-    if approver_id not in approval_queue:
+    if not approval_queue.has_approver(approver_id):
         return jsonify({"message": "No queue for this approver"}), 404
 
-    queue = approval_queue[approver_id]
-    target_req = None
-    
-    # 1. 대기열에서 해당 요청 찾기
-    for req in queue:
-        if req['requestId'] == request_id:
-            target_req = req
-            break
+    # 1. 대기열에서 해당 요청 찾기 + 2. 대기열에서 제거 + 결과 전송 대기열에 등록
+    # 조회와 제거를 한 번에 처리하므로 동시에 같은 요청을 처리해도 한 쪽만 성공
+    target_req = approval_queue.decide(approver_id, request_id, status)
     
     if not target_req:
         return jsonify({"message": "Request ID not found in queue"}), 404
 
-    # 2. 대기열에서 제거 (처리 완료되었으므로) 
-    queue.remove(target_req)
+    release_cached_body(target_req, status)
     print(f"[API] Request {request_id} processed as {status} by {approver_id}. Removed from queue.")
+    return jsonify({"message": "Accepted. The result will be delivered to Request Service"}), 202
+
+# --- [기능 3] REST API: 결재 일괄 처리 ---
+MAX_BATCH_DECISIONS = 500
 
-    # 3. Request Service로 결과 전송 (gRPC Client) 
+# -- Helper: 결과 일괄 전송 --
+# ReturnApprovalResults 한 번으로 전송하고 { requestId: 처리 결과 } 반환
+# (Request Service가 일괄 RPC를 지원하지 않으면 단건 RPC로 나눠서 전송)
+def report_results(results):
+    channel = request_channels.get(f'localhost:{REQUEST_SERVICE_GRPC_PORT}')
     try:
-        with grpc.insecure_channel(f'localhost:{REQUEST_SERVICE_GRPC_PORT}') as channel:
-            stub = approval_pb2_grpc.ApprovalStub(channel)
-            
-            print(f"[gRPC Client] Sending result to Request Service (Port {REQUEST_SERVICE_GRPC_PORT})...")
-            
-            stub.ReturnApprovalResult(approval_pb2.ApprovalResultRequest(
-                requestId=request_id,
-                step=target_req['currentStep'], # 저장해둔 단계 번호 사용
-                approverId=int(approver_id),
-                status=status
-            ))
-    except Exception as e:
-        print(f"[Error] Failed to report result via gRPC: {e}")
-        # 실패 시 큐에 복구하는 로직이 필요할 수 있으나, 여기선 생략
-        return jsonify({"message": "Processed locally but failed to notify Request Service"}), 500
-        
-    return jsonify({"message": "Processed successfully"}), 200
+        response = channel.call('ReturnApprovalResults', approval_pb2.ApprovalResultBatch(results=results),
+                                timeout=GRPC_CALL_TIMEOUT)
+        return {r.requestId: r.status for r in response.results}
+    except grpc.RpcError as e:
+        if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+            raise
+    return {r.requestId: channel.call('ReturnApprovalResult', r, timeout=GRPC_CALL_TIMEOUT).status for r in results}
+
+@app.route('/process/<approver_id>/batch', methods=['POST'])
+def process_approval_batch(approver_id):
+    # Request: {"decisions": [{"requestId": 1, "status": "approved"}, ...]}
+    # Response: {"results": [{"requestId": 1, "status": "approved", "outcome": "accepted"}, ...]}
+    # outcome: accepted(대기열에서 제거, 결과는 result_delivery가 전송) / not_found / invalid
+    # 단건 처리와 마찬가지로 결정은 WAL에 기록 후 바로 202 응답
+    data = request.json or {}
+    decisions = data.get("decisions")
+
+    if not isinstance(decisions, list) or not decisions:
+        return jsonify({"message": "'decisions' must be a non-empty list"}), 400
+    if len(decisions) > MAX_BATCH_DECISIONS:
+        return jsonify({"message": f"At most {MAX_BATCH_DECISIONS} decisions per batch"}), 400
+    if not approval_queue.has_approver(approver_id):
+        return jsonify({"message": "No queue for this approver"}), 404
+
+    # 1. 입력 검증 (잘못된 항목은 건너뛰고 결과에 invalid로 표시)
+    valid = {}
+    for d in decisions:
+        request_id = d.get("requestId") if isinstance(d, dict) else None
+        status = d.get("status") if isinstance(d, dict) else None
+        if type(request_id) is not int or status not in DECISION_STATUSES:
+            continue
+        valid[request_id] = status
+    # 2. 대기열에서 한 번에 꺼내고 결과 전송 대기열에 등록
+    decided = approval_queue.decide_many(approver_id, valid)
+
+    outcomes = {}
+    for request_id, status in valid.items():
+        target_req = decided[request_id]
+        if target_req is None:
+            outcomes[request_id] = "not_found"
+            continue
+        release_cached_body(target_req, status)
+        outcomes[request_id] = "accepted"
+    print(f"[API] Batch of {sum(o == 'accepted' for o in outcomes.values())} decisions by {approver_id}. Removed from queue.")
+
+    response = []
+    for d in decisions:
+        request_id = d.get("requestId") if isinstance(d, dict) else None
+        status = d.get("status") if isinstance(d, dict) else None
+        valid_item = type(request_id) is int and status in DECISION_STATUSES
+        response.append({
+            "requestId": request_id,
+            "status": status,
+            "outcome": outcomes[request_id] if valid_item and request_id in outcomes else "invalid"
+        })
+    return jsonify({"results": response}), 202
+
+# --- [기능 4] 결과 백그라운드 전송 ---
+# -- Helper: 결정 1건 -> gRPC 결과 메시지 --
+def decision_to_result(decision):
+    return approval_pb2.ApprovalResultRequest(
+        requestId=decision['item']['requestId'],
+        step=decision['item']['currentStep'], # 저장해둔 단계 번호 사용
+        approverId=int(decision['approverId']),
+        status=decision['status']
+    )
+
+# 결정 묶음을 결과 스트림으로 한꺼번에 보내고(ack 대기 없이 연속 전송) { decisionId: 처리 결과 } 반환
+# 스트림 미지원 서버면 ReturnApprovalResults 일괄 RPC 사용
+def deliver_decisions(decisions):
+    print(f"[gRPC Client] Sending {len(decisions)} results to Request Service (Port {REQUEST_SERVICE_GRPC_PORT})...")
+    sent = []
+    unsent = []
+    for decision in decisions:
+        try:
+            sent.append((decision, result_stream.submit(decision_to_result(decision), timeout=GRPC_CALL_TIMEOUT)))
+        except StreamUnsupported:
+            unsent.append(decision)
+        except Exception as e:
+            print(f"[Error] Failed to send result {decision['item']['requestId']} via gRPC stream: {e}")
+
+    outcomes = {}
+    for decision, future in sent:
+        try:
+            outcomes[decision['id']] = future.result(timeout=GRPC_CALL_TIMEOUT)
+        except StreamUnsupported:
+            unsent.append(decision)
+        except futures.TimeoutError:
+            # ack를 기다리지 않음 (window 자리 반납), 결정은 result_delivery가 재시도
+            result_stream.abandon(future)
+            print(f"[Error] No ack for result {decision['item']['requestId']} within {GRPC_CALL_TIMEOUT}s")
+        except Exception as e:
+            print(f"[Error] Failed to report result {decision['item']['requestId']} via gRPC stream: {e}")
+
+    if unsent:
+        by_request = report_results([decision_to_result(d) for d in unsent])
+        outcomes.update((d['id'], by_request.get(d['item']['requestId'])) for d in unsent)
+    return outcomes
+
+# 전송이 계속 실패하면 결재자 대기 목록에 되돌려서 다시 처리할 수 있게 함
+result_delivery = ResultDelivery(deliver_decisions, restore=approval_queue.add)
+approval_queue.decisions = result_delivery
 
 # gRPC 서버 실행 함수
+grpc_server = None
+grpc_loop = None  # aio 모드에서 서버가 실행 중인 이벤트 루프
+
+async def serve_grpc_aio():
+    global grpc_server, grpc_loop
+    grpc_loop = asyncio.get_running_loop()
+    server = grpc.aio.server(options=SERVER_KEEPALIVE_OPTIONS)
+    grpc_server = server
+    approval_pb2_grpc.add_ApprovalServicer_to_server(AsyncApprovalServicer(), server)
+    server.add_insecure_port(f'[::]:{MY_GRPC_PORT}')
+    print(f"Approval Processing Service (gRPC aio) started on port {MY_GRPC_PORT} (shard {SHARD_INDEX + 1}/{len(SHARDS)})...")
+    await server.start()
+    await server.wait_for_termination()
+
 def serve_grpc():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    global grpc_server
+    if GRPC_SERVER_MODE == "aio":
+        asyncio.run(serve_grpc_aio())
+        return
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=GRPC_MAX_STREAMS + GRPC_UNARY_WORKERS),
+                         options=SERVER_KEEPALIVE_OPTIONS)
+    grpc_server = server
     approval_pb2_grpc.add_ApprovalServicer_to_server(ApprovalServicer(), server)
     server.add_insecure_port(f'[::]:{MY_GRPC_PORT}')
-    print(f"Approval Processing Service (gRPC) started on port {MY_GRPC_PORT}...")
+    print(f"Approval Processing Service (gRPC) started on port {MY_GRPC_PORT} (shard {SHARD_INDEX + 1}/{len(SHARDS)})...")
     server.start()
     server.wait_for_termination()
 
+# 종료 시 열려 있는 스트림을 끊어야 gRPC 워커 스레드가 끝나고 프로세스가 종료됨
+def stop_grpc(grace=1):
+    if grpc_server is None:
+        return
+    if grpc_loop is not None:
+        asyncio.run_coroutine_threadsafe(grpc_server.stop(grace), grpc_loop).result()
+    else:
+        grpc_server.stop(grace).wait()
+
 if __name__ == '__main__':
+    # 0. 대기 목록 복구 후 WAL 기록 시작
+    journal.recover(approval_queue, result_delivery)
+    approval_queue.journal = journal
+    result_delivery.journal = journal
+    journal.start(approval_queue, result_delivery)
+    result_delivery.start()
+
     # 1. gRPC 서버 스레드 실행
     t = threading.Thread(target=serve_grpc)
     t.daemon = True
     t.start()
     
     # 2. Flask 웹 서버 실행
-    # Request Service(5002)와 충돌 방지를 위해 5003 포트 사용
+    # Request Service(5002)와 충돌 방지를 위해 5003 포트 사용 (샤드별 포트는 PROCESSING_SHARDS 참고)
     # use_reloader=False 필수
-    app.run(port=5003, debug=True, use_reloader=False)
\ No newline at end of file
+    app.run(port=MY_HTTP_PORT, debug=True, use_reloader=False)
+
+    # 3. 종료 처리
+    result_delivery.stop()
+    result_stream.close()
+    stop_grpc()
+
+    # 종료 시 스냅샷을 남겨서 다음 기동 시 WAL 재생을 최소화
+    journal.checkpoint(approval_queue, result_delivery)
+    journal.close()
\ No newline at end of file
@@ -0,0 +1,186 @@
+import itertools
+import math
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+
+from result_delivery import new_decision
+
+
+class ApproverQueue:
+    """결재자별 대기 목록
+
+    구조: { "approverId_String": OrderedDict(requestId -> (seq, request_data)) }
+    - (approverId, requestId)로 O(1) 조회/삭제
+    - 결재자별로 들어온 순서대로 순회, seq(추가 순번)는 페이지 cursor로 사용
+    - 결재자별 version: 대기 목록이 바뀔 때마다 증가 (ETag / 변경 감지용)
+      stripe마다 Condition을 두어 wait_for_change()로 변경을 기다릴 수 있음 (long-poll)
+    - approverId 해시로 나눈 lock striping (서로 다른 결재자는 대부분 다른 lock 사용)
+    - journal(QueueJournal)이 설정되어 있으면 변경 내용을 같은 lock 안에서 WAL에 기록
+    - decisions(ResultDelivery): decide()로 꺼낸 요청의 결과를 넘겨받아 백그라운드로 전송
+    """
+
+    def __init__(self, stripes=64, journal=None, decisions=None):
+        self._stripes = [threading.Condition(threading.Lock()) for _ in range(stripes)]
+        self._queues = {}
+        self._versions = {}
+        self._seq = itertools.count(1)
+        self.journal = journal
+        self.decisions = decisions
+
+    def _lock(self, approver_id):
+        return self._stripes[hash(approver_id) % len(self._stripes)]
+
+    def _touch(self, approver_id):
+        self._versions[approver_id] = self._versions.get(approver_id, 0) + 1
+
+    def _bump(self, approver_id):
+        # stripe lock 안에서 호출: version 증가 후 같은 stripe에서 기다리는 요청을 깨움
+        self._touch(approver_id)
+        self._lock(approver_id).notify_all()
+
+    def _put(self, queue, item):
+        # 이미 있는 요청이면 순번(위치)은 그대로 두고 내용만 교체
+        entry = queue.get(item['requestId'])
+        queue[item['requestId']] = (entry[0] if entry is not None else next(self._seq), item)
+        return entry is None
+
+    def add(self, approver_id, item):
+        """대기 목록에 추가 (같은 requestId가 이미 있으면 내용만 갱신), 새로 추가되면 True"""
+        with self._lock(approver_id):
+            if self.journal is not None:
+                self.journal.log_add(approver_id, item)
+            is_new = self._put(self._queues.setdefault(approver_id, OrderedDict()), item)
+            self._bump(approver_id)
+            return is_new
+
+    def pop(self, approver_id, request_id):
+        """대기 목록에서 꺼내서 반환 (없으면 None)"""
+        with self._lock(approver_id):
+            queue = self._queues.get(approver_id)
+            if queue is None or request_id not in queue:
+                return None
+            if self.journal is not None:
+                self.journal.log_remove(approver_id, request_id)
+            self._bump(approver_id)
+            return queue.pop(request_id)[1]
+
+    def decide(self, approver_id, request_id, status):
+        """대기 목록에서 꺼내고 결정(status)을 decisions 전송 대기열에 넘김, 꺼낸 요청 반환 (없으면 None)
+
+        제거와 결정을 WAL 레코드 1건(decide)으로 기록하므로 중간에 종료되어도 결정이 사라지지 않음
+        """
+        with self._lock(approver_id):
+            queue = self._queues.get(approver_id)
+            if queue is None or request_id not in queue:
+                return None
+            item = queue[request_id][1]
+            decision = new_decision(approver_id, item, status)
+            if self.journal is not None:
+                self.journal.log_decide(approver_id, request_id, decision)
+            del queue[request_id]
+            self._bump(approver_id)
+            # stripe lock 안에서 넘겨야 checkpoint 스냅샷에서 누락되지 않음
+            self.decisions.submit(decision)
+            return item
+
+    def decide_many(self, approver_id, decisions):
+        """여러 결정을 한 번의 lock 안에서 decide()와 같이 처리: { requestId: 꺼낸 요청 or None }
+
+        decisions: { requestId: status }, 항목마다 decide 레코드로 기록하므로 전송 전에 종료되어도 유실되지 않음
+        """
+        with self._lock(approver_id):
+            queue = self._queues.get(approver_id)
+            decided = {}
+            for request_id, status in decisions.items():
+                if queue is None or request_id not in queue:
+                    decided[request_id] = None
+                    continue
+                item = queue[request_id][1]
+                decision = new_decision(approver_id, item, status)
+                if self.journal is not None:
+                    self.journal.log_decide(approver_id, request_id, decision)
+                del queue[request_id]
+                self.decisions.submit(decision)
+                decided[request_id] = item
+            if any(item is not None for item in decided.values()):
+                self._bump(approver_id)
+            return decided
+
+    def get(self, approver_id, request_id):
+        with self._lock(approver_id):
+            queue = self._queues.get(approver_id)
+            entry = queue.get(request_id) if queue is not None else None
+            return entry[1] if entry is not None else None
+
+    def items(self, approver_id):
+        """결재자의 대기 목록 (들어온 순서, 복사본)"""
+        with self._lock(approver_id):
+            queue = self._queues.get(approver_id)
+            return [item for _, item in queue.values()] if queue is not None else []
+
+    def page(self, approver_id, after=0, limit=100):
+        """seq가 after보다 큰 항목을 최대 limit개: (items, 다음 cursor 또는 None, version)
+
+        cursor가 순번이므로 앞 페이지 항목이 처리되어 빠져도 건너뛰는 항목이 없음
+        """
+        with self._lock(approver_id):
+            queue = self._queues.get(approver_id)
+            version = self._versions.get(approver_id, 0)
+            if queue is None:
+                return [], None, version
+            entries = (entry for entry in queue.values() if entry[0] > after)
+            page = list(itertools.islice(entries, limit + 1))
+            next_cursor = page[limit - 1][0] if len(page) > limit else None
+            return [item for _, item in page[:limit]], next_cursor, version
+
+    def version(self, approver_id):
+        return self._versions.get(approver_id, 0)
+
+    def wait_for_change(self, approver_id, since, timeout):
+        """version이 since와 달라질 때까지 최대 timeout초 대기 후 현재 version 반환"""
+        if not math.isfinite(timeout):
+            raise ValueError(f"timeout must be finite: {timeout}")
+        cond = self._lock(approver_id)
+        with cond:
+            cond.wait_for(lambda: self._versions.get(approver_id, 0) != since, timeout)
+            return self._versions.get(approver_id, 0)
+
+    def has_approver(self, approver_id):
+        # 한 번이라도 대기 목록이 생성된 결재자인지 확인
+        return approver_id in self._queues
+
+    def size(self, approver_id):
+        with self._lock(approver_id):
+            queue = self._queues.get(approver_id)
+            return len(queue) if queue is not None else 0
+
+    def __len__(self):
+        return sum(len(q) for q in list(self._queues.values()))
+
+    # --- [복구/스냅샷용] WAL에 기록하지 않는 내부 조작 ---
+    def load(self, approver_id, item):
+        self._put(self._queues.setdefault(approver_id, OrderedDict()), item)
+        self._touch(approver_id)
+
+    def load_many(self, approver_id, items):
+        queue = self._queues.setdefault(approver_id, OrderedDict())
+        queue.update((item['requestId'], (next(self._seq), item)) for item in items)
+        self._touch(approver_id)
+
+    def discard(self, approver_id, request_id):
+        queue = self._queues.get(approver_id)
+        if queue is not None and queue.pop(request_id, None) is not None:
+            self._touch(approver_id)
+
+    @contextmanager
+    def frozen(self):
+        """모든 stripe lock을 잡아서 큐 전체 변경을 잠시 멈춤 (일관된 스냅샷용)"""
+        with ExitStack() as stack:
+            for lock in self._stripes:
+                stack.enter_context(lock)
+            yield
+
+    def dump(self):
+        # frozen() 안에서 호출: [(approverId, [item, ...]), ...]
+        return [(approver_id, [item for _, item in queue.values()]) for approver_id, queue in self._queues.items()]
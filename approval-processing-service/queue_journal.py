@@ -0,0 +1,264 @@
+import gc
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import ExitStack
+
+SNAPSHOT_FILE = "approval_queue.snapshot.json"
+SEGMENT_PATTERN = "approval_queue.jwal.{:08d}"
+# 이전 버전(pickle 형식) 파일 이름: 코드 실행이 가능한 형식이라 읽지 않음
+LEGACY_FILES = ("approval_queue.snapshot", "approval_queue.wal.*")
+
+# WAL 레코드: [4바이트 길이][UTF-8 JSON] (레코드는 문자열/숫자/리스트/dict로만 구성)
+RECORD_HEADER = struct.Struct("<I")
+
+
+def _encode(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _read_records(path):
+    """WAL 세그먼트를 mmap으로 열어서 레코드를 순서대로 반환 (마지막 레코드가 잘려 있으면 무시)"""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offset = 0
+            end = len(mm)
+            while offset < end:
+                if offset + RECORD_HEADER.size > end:
+                    print(f"[Journal] Ignoring torn record at end of {os.path.basename(path)}")
+                    return
+                (length,) = RECORD_HEADER.unpack_from(mm, offset)
+                start = offset + RECORD_HEADER.size
+                if start + length > end:
+                    print(f"[Journal] Ignoring torn record at end of {os.path.basename(path)}")
+                    return
+                yield json.loads(mm[start:start + length])
+                offset = start + length
+
+
+class QueueJournal:
+    """ApproverQueue용 append-only write-ahead log + 주기적 스냅샷
+
+    - 모든 add/remove를 WAL 세그먼트에 길이 prefix + JSON 레코드로 기록 (seq 증가)
+    - 결재 결정(decide)과 전송 완료(settle)도 기록해서 전송 대기 중인 결과(ResultDelivery)까지 보존
+    - checkpoint: 큐 전체를 스냅샷 파일로 저장한 뒤 이전 세그먼트 삭제 (compaction)
+    - recover: 스냅샷 로드 + 이후 seq의 WAL 재생으로 큐 복원
+    매 기록마다 OS에 write(flush)하고 fsync는 fsync_interval 주기로 묶어서 처리
+    (fsync_interval=0 이면 매 기록마다 fsync)
+    """
+
+    def __init__(self, directory, fsync_interval=0.1,
+                 checkpoint_interval=60, checkpoint_min_records=10000):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_min_records = checkpoint_min_records
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.seq = 0
+        self._records_since_checkpoint = 0
+        self._segment = None
+        self._file = None
+        self._dirty = False
+        self._stop = threading.Event()
+        self._threads = []
+
+    # -- Helper: 파일 경로 --
+    def _snapshot_path(self):
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, SEGMENT_PATTERN.format(number))
+
+    def _segments(self):
+        paths = glob.glob(os.path.join(self.directory, SEGMENT_PATTERN.split("{")[0] + "*"))
+        return sorted(int(p.rsplit(".", 1)[1]) for p in paths)
+
+    def _open_segment(self, number):
+        self._segment = number
+        self._file = open(self._segment_path(number), "ab")
+
+    # --- [기록] ---
+    def append(self, record):
+        with self._lock:
+            self.seq += 1
+            record["seq"] = self.seq
+            data = _encode(record)
+            self._file.write(RECORD_HEADER.pack(len(data)) + data)
+            self._file.flush()
+            if self.fsync_interval == 0:
+                os.fsync(self._file.fileno())
+            else:
+                self._dirty = True
+            self._records_since_checkpoint += 1
+
+    def log_add(self, approver_id, item):
+        self.append({"op": "add", "approverId": approver_id, "item": item})
+
+    def log_remove(self, approver_id, request_id):
+        self.append({"op": "remove", "approverId": approver_id, "requestId": request_id})
+
+    def log_decide(self, approver_id, request_id, decision):
+        self.append({"op": "decide", "approverId": approver_id, "requestId": request_id, "decision": decision})
+
+    def log_settle(self, decision_id):
+        self.append({"op": "settle", "decisionId": decision_id})
+
+    def sync(self):
+        with self._lock:
+            if self._dirty and self._file is not None:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+
+    # --- [스냅샷] ---
+    def _rotate(self):
+        # 새 세그먼트로 전환하고 (현재 seq, 이전 세그먼트 번호 목록) 반환
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            old = self._segment
+            self._open_segment(old + 1)
+            self._dirty = False
+            self._records_since_checkpoint = 0
+            return self.seq, [n for n in self._segments() if n <= old]
+
+    def _write_snapshot(self, state, decisions, seq):
+        path = self._snapshot_path()
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_encode({"seq": seq, "state": state, "decisions": decisions}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)  # 원자적 교체
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        return sum(len(items) for _, items in state)
+
+    def checkpoint(self, queue, delivery=None):
+        """큐 전체(+ 전송 대기 결정)를 스냅샷으로 저장하고 스냅샷에 포함된 WAL 세그먼트 삭제"""
+        started = time.monotonic()
+        # 모든 stripe lock을 잡은 상태에서 상태 복사 + 세그먼트 전환 (seq와 상태가 일치하도록)
+        with ExitStack() as stack:
+            stack.enter_context(queue.frozen())
+            if delivery is not None:
+                stack.enter_context(delivery.frozen())
+            state = queue.dump()
+            decisions = delivery.dump() if delivery is not None else []
+            seq, old_segments = self._rotate()
+        count = self._write_snapshot(state, decisions, seq)
+        for number in old_segments:
+            os.remove(self._segment_path(number))
+        print(f"[Journal] Checkpoint at seq {seq}: {count} entries ({time.monotonic() - started:.2f}s)")
+
+    # --- [복구] ---
+    def _check_legacy_files(self):
+        legacy = [os.path.basename(p) for name in LEGACY_FILES for p in glob.glob(os.path.join(self.directory, name))]
+        if legacy:
+            raise RuntimeError(
+                f"Found queue data in the old pickle format in {self.directory}: {', '.join(sorted(legacy))}. "
+                "It is not loaded because pickle can execute code. Drain the queue with the previous version "
+                "(checkpoint, then deliver or re-send pending approvals) and remove these files before starting."
+            )
+
+    def recover(self, queue, delivery=None):
+        """스냅샷 + WAL로 큐(+ 전송 대기 결정)를 복원하고 기록을 시작할 세그먼트를 연다 (기동 시 1회)"""
+        started = time.monotonic()
+        self._check_legacy_files()
+        snapshot_seq = 0
+        loaded = 0
+        replayed = 0
+        segments = self._segments()
+
+        # 대량의 dict를 한 번에 만들 때 GC가 반복 실행되지 않도록 잠시 끔
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            path = self._snapshot_path()
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                with open(path, "rb") as f:
+                    snapshot = json.loads(f.read())
+                snapshot_seq = snapshot["seq"]
+                for approver_id, items in snapshot["state"]:
+                    queue.load_many(approver_id, items)
+                    loaded += len(items)
+                if delivery is not None:
+                    for decision in snapshot.get("decisions", []):
+                        delivery.load(decision)
+                del snapshot
+
+            last_seq = snapshot_seq
+            for number in segments:
+                for record in _read_records(self._segment_path(number)):
+                    if record["seq"] <= snapshot_seq:
+                        continue  # 이미 스냅샷에 반영된 기록
+                    if record["op"] == "add":
+                        queue.load(record["approverId"], record["item"])
+                    elif record["op"] == "remove":
+                        queue.discard(record["approverId"], record["requestId"])
+                    elif record["op"] == "decide":
+                        queue.discard(record["approverId"], record["requestId"])
+                        if delivery is not None:
+                            delivery.load(record["decision"])
+                    elif record["op"] == "settle" and delivery is not None:
+                        delivery.discard(record["decisionId"])
+                    last_seq = record["seq"]
+                    replayed += 1
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        self.seq = last_seq
+        self._records_since_checkpoint = replayed
+        # 잘린 기록이 있을 수 있으므로 기존 세그먼트에 이어 쓰지 않고 새 세그먼트 사용
+        self._open_segment((segments[-1] + 1) if segments else 1)
+        print(f"[Journal] Recovered {len(queue)} pending approvals "
+              f"(snapshot {loaded}, replayed {replayed}) in {time.monotonic() - started:.2f}s")
+        if delivery is not None:
+            print(f"[Journal] Recovered {delivery.stats()['pending']} undelivered decisions")
+
+    # --- [백그라운드] fsync / 주기적 checkpoint ---
+    def _fsync_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            self.sync()
+
+    def _checkpoint_loop(self, queue, delivery):
+        while not self._stop.wait(self.checkpoint_interval):
+            with self._lock:
+                due = self._records_since_checkpoint >= self.checkpoint_min_records
+            if due:
+                try:
+                    self.checkpoint(queue, delivery)
+                except Exception as e:
+                    print(f"[Journal] Checkpoint failed: {e}")
+
+    def start(self, queue, delivery=None):
+        if self._threads:
+            return
+        if self.fsync_interval > 0:
+            self._threads.append(threading.Thread(target=self._fsync_loop, daemon=True))
+        self._threads.append(threading.Thread(target=self._checkpoint_loop, args=(queue, delivery), daemon=True))
+        for t in self._threads:
+            t.start()
+
+    def close(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join()
+        self._threads = []
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
@@ -0,0 +1,171 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Request Service가 반영했거나(success) 이미 반영된 결과(ignored)면 전송 완료
+DELIVERED_OUTCOMES = ("success", "ignored")
+
+
+def new_decision(approver_id, item, status):
+    # WAL/스냅샷에 그대로 기록되는 결정 1건
+    return {"id": uuid.uuid4().hex, "approverId": approver_id, "item": item, "status": status}
+
+
+class ResultDelivery:
+    """결재 결과(승인/반려) 백그라운드 전송기
+
+    - submit(): 결정을 대기열에 넣고 즉시 반환 (HTTP 응답은 전송을 기다리지 않음)
+    - 워커가 대기 중인 결정을 최대 batch_size개씩 모아 send_batch로 한 번에 전송
+    - 실패한 결정은 지수 백오프(최대 max_backoff초)로 재시도
+    - max_attempts번 연속 실패하면 restore(approverId, item)로 결재자 대기 목록에 되돌림
+    - journal(QueueJournal)이 설정되어 있으면 전송이 끝난 결정을 WAL에 기록 (settle)
+      (결정 자체는 ApproverQueue.decide()가 대기 목록 제거와 함께 한 번에 기록)
+    """
+
+    def __init__(self, send_batch, restore, journal=None, batch_size=100, linger=0.05,
+                 max_attempts=8, backoff=0.5, max_backoff=30):
+        self.send_batch = send_batch  # send_batch([decision, ...]) -> { decisionId: outcome }
+        self.restore = restore        # restore(approverId, item)
+        self.journal = journal
+        self.batch_size = batch_size
+        self.linger = linger          # 첫 결정이 들어온 뒤 배치를 모으는 시간 (초)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = OrderedDict()  # decisionId -> decision (들어온 순서)
+        self._attempts = {}            # decisionId -> 실패 횟수
+        self._next_attempt = {}        # decisionId -> 다음 전송 가능 시각 (monotonic)
+        self._inflight = set()
+        self._stop = False
+        self._thread = None
+        self.delivered = 0
+        self.restored = 0
+
+    def submit(self, decision):
+        with self._lock:
+            self._pending[decision["id"]] = decision
+            self._wakeup.notify()
+
+    def _due(self, now):
+        # self._lock 안에서 호출: 지금 보낼 수 있는 결정 목록 + 가장 빠른 재시도 시각
+        batch = []
+        next_at = None
+        for decision_id, decision in self._pending.items():
+            if decision_id in self._inflight:
+                continue
+            at = self._next_attempt.get(decision_id, 0)
+            if at <= now:
+                batch.append(decision)
+                if len(batch) >= self.batch_size:
+                    break
+            elif next_at is None or at < next_at:
+                next_at = at
+        return batch, next_at
+
+    def _settle(self, decision_id):
+        # 전송 완료 또는 포기한 결정을 대기열에서 제거 (WAL에도 기록)
+        with self._lock:
+            if self._pending.pop(decision_id, None) is None:
+                return
+            self._attempts.pop(decision_id, None)
+            self._next_attempt.pop(decision_id, None)
+            if self.journal is not None:
+                self.journal.log_settle(decision_id)
+
+    def _fail(self, decision, now):
+        decision_id = decision["id"]
+        with self._lock:
+            attempts = self._attempts.get(decision_id, 0) + 1
+            self._attempts[decision_id] = attempts
+            delay = min(self.backoff * (2 ** (attempts - 1)), self.max_backoff)
+            self._next_attempt[decision_id] = now + delay
+        if attempts < self.max_attempts:
+            return
+        # 계속 실패: 결재자가 다시 처리할 수 있도록 대기 목록에 되돌림
+        # (먼저 되돌리고 나서 제거 -> 중간에 종료되어도 결정이 사라지지 않음)
+        print(f"[Delivery] Giving up on request {decision['item']['requestId']} after {attempts} attempts. "
+              f"Restoring to approver {decision['approverId']}'s queue.")
+        self.restore(decision["approverId"], decision["item"])
+        self._settle(decision_id)
+        self.restored += 1
+
+    def _deliver(self, batch):
+        now = time.monotonic()
+        try:
+            outcomes = self.send_batch(batch)
+        except Exception as e:
+            print(f"[Delivery] Failed to deliver {len(batch)} results: {e}")
+            outcomes = {}
+        for decision in batch:
+            if outcomes.get(decision["id"]) in DELIVERED_OUTCOMES:
+                self._settle(decision["id"])
+                self.delivered += 1
+            else:
+                self._fail(decision, now)
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                while True:
+                    if self._stop:
+                        return
+                    batch, next_at = self._due(time.monotonic())
+                    if batch:
+                        break
+                    self._wakeup.wait(None if next_at is None else max(next_at - time.monotonic(), 0))
+            # 조금 더 기다렸다가 그 사이 들어온 결정까지 함께 전송
+            if len(batch) < self.batch_size and self.linger > 0:
+                time.sleep(self.linger)
+                with self._lock:
+                    batch, _ = self._due(time.monotonic())
+            with self._lock:
+                self._inflight.update(d["id"] for d in batch)
+            try:
+                self._deliver(batch)
+            finally:
+                with self._lock:
+                    self._inflight.difference_update(d["id"] for d in batch)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop = False
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # 아직 전송하지 못한 결정은 WAL/스냅샷에 남아 있으므로 다음 기동 시 다시 전송
+        with self._lock:
+            self._stop = True
+            self._wakeup.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "retrying": len(self._attempts),
+                "delivered": self.delivered,
+                "restored": self.restored
+            }
+
+    # --- [복구/스냅샷용] WAL에 기록하지 않는 내부 조작 ---
+    def load(self, decision):
+        self._pending[decision["id"]] = decision
+
+    def discard(self, decision_id):
+        self._pending.pop(decision_id, None)
+
+    def frozen(self):
+        # checkpoint 중 settle 기록이 스냅샷과 어긋나지 않도록 잠시 멈춤
+        return self._lock
+
+    def dump(self):
+        # frozen() 안에서 호출
+        return list(self._pending.values())
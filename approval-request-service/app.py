@@ -1,148 +1,410 @@
-from flask import Flask, request, jsonify
-from flask_restx import Api, Resource
-from pymongo import MongoClient
+from flask import Flask, request, jsonify, Response, stream_with_context
+from flask_restx import Api, Resource, reqparse
+from pymongo import AsyncMongoClient, MongoClient, ReturnDocument
 import grpc
 from concurrent import futures
+import asyncio
 import threading
 import sys
 import os
 import datetime
 import requests
+import base64
+import json
 
 # proto 파일 경로 설정 (구조에 맞게 수정 필요)
 sys.path.append(os.path.abspath("../proto")) 
+sys.path.append(os.path.abspath("../common"))
 import approval_pb2
 import approval_pb2_grpc
+from grpc_channel import GrpcChannelManager, SERVER_KEEPALIVE_OPTIONS
+from grpc_stream import StreamLimiter, AckedStream, StreamUnsupported, serve_acked_stream, serve_acked_stream_async
+from outbox import ApprovalOutbox
+from ttl_cache import TTLCache
+from indexes import ensure_indexes, rekey_duplicate_request_ids, verify_query_plans
+from id_allocator import RequestIdAllocator
+from notifier import NotificationDispatcher
+from sharding import HashRing, load_processing_shards
 
 app = Flask(__name__)
 api = Api(app)
 
 # MongoDB 연결
-client = MongoClient('mongodb://localhost:27017/')
-db = client['erp_db']
+MONGO_URI = 'mongodb://localhost:27017/'
+MONGO_DB = 'erp_db'
+client = MongoClient(MONGO_URI)
+db = client[MONGO_DB]
 collection = db['approvals']
+outbox_collection = db['approval_outbox']  # Processing Service 전달 대기 이벤트
+counters = db['counters']                  # requestId 발급용 카운터
+
+# requestId 발급기 (카운터 구간을 미리 예약해서 대부분 DB 왕복 없이 발급)
+id_allocator = RequestIdAllocator(counters)
 
 # --- [설정] 포트 관리 ---
-PROCESSING_SERVICE_PORT = 50051  # Processing Service가 켜진 포트와 일치시켜야 함!
+# Processing Service 샤드 목록은 PROCESSING_SHARDS 환경변수로 지정 (common/sharding.py 참고)
+# 기본값은 단일 샤드 localhost:50051 -> Processing Service가 켜진 포트와 일치시켜야 함!
+# 샤드마다 결과 스트림(StreamApprovalResults)이 하나씩 열리므로 샤드 수가 GRPC_MAX_STREAMS(아래)를 넘지 않게 할 것
+# (넘는 샤드는 단건 ReturnApprovalResults로 회신), 반대로 각 샤드도 이 프로세스의 요청 스트림을 하나씩 받음
+PROCESSING_SHARDS = load_processing_shards()
 MY_GRPC_PORT = 50052             # 내(Request Service)가 수신할 포트
 EMPLOYEE_SERVICE_URL = "http://localhost:5001"
 NOTIFICATION_SERVICE_URL = "http://localhost:5004"
+GRPC_CALL_TIMEOUT = 5  # gRPC 호출 타임아웃 (초)
+# gRPC 서버 방식: thread(스레드 풀) / aio(grpc.aio + AsyncMongoClient, 동시 처리 수가 스레드 수에 묶이지 않음)
+GRPC_SERVER_MODE = os.environ.get("GRPC_SERVER_MODE", "thread")
+# thread 모드: 장기 스트림은 열려 있는 동안 워커 스레드 하나를 계속 점유하므로
+# 스트림은 GRPC_MAX_STREAMS개까지만 받고(초과 시 RESOURCE_EXHAUSTED -> 상대는 단건 RPC 사용)
+# 워커 스레드는 그 위에 단건 RPC용 GRPC_UNARY_WORKERS개를 더 둬서 스트림이 단건 RPC를 막지 않게 함
+GRPC_MAX_STREAMS = int(os.environ.get("GRPC_MAX_STREAMS", "32"))
+GRPC_UNARY_WORKERS = 10
+EMPLOYEE_LOOKUP_TIMEOUT = 3  # Employee Service 조회 타임아웃 (초)
+
+# Employee Service 호출은 keep-alive 세션 재사용
+employee_http = requests.Session()
+
+# 직원 존재 여부 캐시 { employeeId(int): True/False }
+# 존재하지 않는 ID(negative)는 곧 생성될 수도 있으므로 짧게 보관
+EMPLOYEE_CACHE_SIZE = 10000
+EMPLOYEE_CACHE_TTL = 300           # 초
+EMPLOYEE_NEGATIVE_CACHE_TTL = 30   # 초
+employee_cache = TTLCache(max_size=EMPLOYEE_CACHE_SIZE, ttl=EMPLOYEE_CACHE_TTL)
+
+# 알림은 백그라운드 워커가 전송 (결과 처리 스레드를 막지 않음)
+notifier = NotificationDispatcher(NOTIFICATION_SERVICE_URL)
+
+# Processing Service로 가는 채널은 요청마다 새로 만들지 않고 프로세스 전체에서 공유
+processing_channels = GrpcChannelManager(approval_pb2_grpc.ApprovalStub)
+
+# 결재 요청은 담당 결재자(approverId)를 consistent hashing해서 해당 샤드로 전송
+processing_ring = HashRing(PROCESSING_SHARDS)
+
+# 샤드마다 장기 유지 스트림(StreamApprovalRequests) 하나씩, 미지원 서버면 단건 RPC 사용
+processing_streams = {
+    shard.grpc_target: AckedStream(
+        processing_channels.get(shard.grpc_target),
+        'StreamApprovalRequests',
+        lambda seq, req: approval_pb2.ApprovalRequestEnvelope(seq=seq, request=req)
+    )
+    for shard in PROCESSING_SHARDS
+}
+
+# 스트림으로 들어온 결과를 병렬 처리할 워커 (MongoDB 왕복 대기 동안 다음 결과 처리)
+result_executor = futures.ThreadPoolExecutor(max_workers=8)
+# thread 모드 gRPC 서버의 장기 스트림 수 제한 (GRPC_MAX_STREAMS 참고)
+stream_limiter = StreamLimiter(GRPC_MAX_STREAMS)
 
 # --- [기능 1] gRPC Client: Processing Service로 요청 전달 ---
 # 가이드 3.2.2 흐름 5번: gRPC를 통해 Approval Processing Service에 RequestApproval 호출 [cite: 49]
+# 실패 시 예외를 그대로 올려서 outbox 디스패처가 재시도하도록 함
 def send_to_processing(request_doc):
-    print(f"[Client] Sending Request {request_doc['requestId']} to Processing Service...")
-    
+    # 현재 결재 차례(첫 번째 pending 단계)의 결재자를 담당하는 샤드 선택
+    current = next((s for s in request_doc['steps'] if s['status'] == 'pending'), None)
+    target_approver = current['approverId'] if current is not None else None
+    shard = processing_ring.shard_for(target_approver if target_approver is not None else request_doc['requestId'])
+    print(f"[Client] Sending Request {request_doc['requestId']} to Processing Service ({shard.grpc_target})...")
+
+    # 담당 샤드로 연결 (풀링된 채널 재사용)
+    channel = processing_channels.get(shard.grpc_target)
+
+    # 두 번째 단계부터는 본문 없이 단계 정보만 전송 (Processing Service의 본문 캐시 사용)
+    if current is not None and any(s['status'] == 'approved' for s in request_doc['steps']):
+        if advance_processing(channel, request_doc['requestId'], current):
+            return
+
+    # Steps 변환 (Dict -> Proto Message)
+    grpc_steps = []
+    for s in request_doc['steps']:
+        grpc_steps.append(approval_pb2.Step(
+            step=s['step'], 
+            approverId=s['approverId'], 
+            status=s['status']
+        ))
+
+    message = approval_pb2.ApprovalRequest(
+        requestId=request_doc['requestId'],
+        requesterId=request_doc['requesterId'],
+        title=request_doc['title'],
+        content=request_doc.get('content', ''),
+        steps=grpc_steps
+    )
+
+    # gRPC 호출 (스트림 우선, 미지원 시 단건 RPC)
     try:
-        # Processing Service 포트로 연결
-        with grpc.insecure_channel(f'localhost:{PROCESSING_SERVICE_PORT}') as channel:
-            stub = approval_pb2_grpc.ApprovalStub(channel)
-            
-            # Steps 변환 (Dict -> Proto Message)
-            grpc_steps = []
-            for s in request_doc['steps']:
-                grpc_steps.append(approval_pb2.Step(
-                    step=s['step'], 
-                    approverId=s['approverId'], 
-                    status=s['status']
-                ))
-
-            # gRPC 호출
-            response = stub.RequestApproval(approval_pb2.ApprovalRequest(
-                requestId=request_doc['requestId'],
-                requesterId=request_doc['requesterId'],
-                title=request_doc['title'],
-                content=request_doc.get('content', ''),
-                steps=grpc_steps
-            ))
-            print(f"[Client] Response: {response.status}")
-            
-    except Exception as e:
-        print(f"[Client] Error sending to Processing Service: {e}")
+        status = processing_streams[shard.grpc_target].send(message, timeout=GRPC_CALL_TIMEOUT)
+    except StreamUnsupported:
+        status = channel.call('RequestApproval', message, timeout=GRPC_CALL_TIMEOUT).status
+    print(f"[Client] Response: {status}")
+    if status != "received":
+        # 예: wrong_shard (샤드 설정 불일치) -> outbox가 재시도
+        raise RuntimeError(f"Processing Service rejected request {request_doc['requestId']}: {status}")
+
+# -- Helper: AdvanceApproval 전송, 반영되면 True (캐시 없음 / 미지원이면 False -> 전체 전송) --
+def advance_processing(channel, request_id, step):
+    message = approval_pb2.AdvanceApprovalRequest(
+        requestId=request_id, step=step['step'], approverId=step['approverId']
+    )
+    try:
+        status = channel.call('AdvanceApproval', message, timeout=GRPC_CALL_TIMEOUT).status
+    except grpc.RpcError as e:
+        if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+            raise
+        status = "unimplemented"
+    print(f"[Client] Advance Response: {status}")
+    return status == "received"
+
+# approval 문서와 함께 outbox에 기록 -> 백그라운드 디스패처가 send_to_processing 호출
+outbox = ApprovalOutbox(client, collection, outbox_collection, send_to_processing)
 
 # --- [기능 2] gRPC Server: 결과 수신 (ReturnApprovalResult) ---
-class RequestServicer(approval_pb2_grpc.ApprovalServicer):
-    # 가이드 3.2.4: Approval Processing Service로부터 ReturnApprovalResult 호출을 받음 [cite: 85]
-    def ReturnApprovalResult(self, request, context):
-        print(f"[Server] Result Received: ID {request.requestId}, Step {request.step}, Status {request.status}")
-        
-        # 1. MongoDB 업데이트 (해당 단계 상태 변경) [cite: 86]
-        collection.update_one(
-            {"requestId": request.requestId, "steps.step": request.step},
-            {"$set": {"steps.$.status": request.status, "updatedAt": datetime.datetime.now()}}
-        )
+# 단계 상태 변경 + finalStatus 결정을 하나의 find_one_and_update(update pipeline)로 처리하고
+# 변경 후 문서를 반환 (결과 1건당 MongoDB 왕복 1회, 동시 결과 수신 시에도 원자적)
+# (filter, update pipeline) 반환: 동기/비동기(aio) 클라이언트 공용
+def step_result_update(request_id, step, status):
+    status = {"$literal": status}
+    return (
+        # 진행 중이고 해당 단계가 아직 pending인 경우에만 반영 (중복 결과는 무시)
+        {
+            "requestId": request_id,
+            "finalStatus": "in_progress",
+            "steps": {"$elemMatch": {"step": step, "status": "pending"}}
+        },
+        [
+            {"$set": {
+                "steps": {"$map": {
+                    "input": "$steps",
+                    "as": "s",
+                    "in": {"$cond": [
+                        {"$eq": ["$$s.step", step]},
+                        {"$mergeObjects": ["$$s", {"status": status}]},
+                        "$$s"
+                    ]}
+                }},
+                "updatedAt": datetime.datetime.now()
+            }},
+            {"$set": {
+                "finalStatus": {"$switch": {
+                    "branches": [
+                        # 반려: 즉시 종료
+                        {"case": {"$eq": [status, "rejected"]}, "then": "rejected"},
+                        # 승인 + 남은 pending 단계 없음: 최종 승인
+                        {"case": {"$and": [
+                            {"$eq": [status, "approved"]},
+                            {"$not": [{"$anyElementTrue": [{"$map": {
+                                "input": "$steps",
+                                "as": "s",
+                                "in": {"$eq": ["$$s.status", "pending"]}
+                            }}]}]}
+                        ]}, "then": "approved"}
+                    ],
+                    "default": "$finalStatus"
+                }}
+            }}
+        ]
+    )
+
+def apply_step_result(request_id, step, status):
+    return collection.find_one_and_update(
+        *step_result_update(request_id, step, status),
+        return_document=ReturnDocument.AFTER
+    )
+
+# 결과 1건 처리 (단건/일괄 RPC 공용), 처리 결과 문자열 반환: success / ignored / error
+def handle_approval_result(result):
+    print(f"[Server] Result Received: ID {result.requestId}, Step {result.step}, Status {result.status}")
+    
+    # 1. MongoDB 업데이트 (해당 단계 상태 변경 + finalStatus 결정, 변경 후 문서 반환) [cite: 86, 87, 94]
+    doc = apply_step_result(result.requestId, result.step, result.status)
+    if not doc:
+        # 문서가 없거나, 이미 처리된 단계에 대한 중복 결과
+        current = collection.find_one({"requestId": result.requestId}, {"finalStatus": 1, "steps": 1})
+        if current is None:
+            return "error"
+        print(f"[Server] Ignoring duplicate result for ID {result.requestId}, Step {result.step}")
+        if needs_redispatch(result, current):
+            outbox.enqueue(result.requestId)
+        return "ignored"
+
+    if after_step_result(result, doc):
+        # 다음 결재자에게 gRPC 전송 (재귀적 호출과 유사) [cite: 91]
+        # outbox에 기록만 하고 실제 전송은 디스패처가 처리
+        outbox.enqueue(result.requestId)
+    return "success"
+
+# aio 모드용 handle_approval_result: MongoDB 호출을 AsyncMongoClient로 await
+async def handle_approval_result_async(result, approvals, outbox_events):
+    print(f"[Server] Result Received: ID {result.requestId}, Step {result.step}, Status {result.status}")
+
+    doc = await approvals.find_one_and_update(
+        *step_result_update(result.requestId, result.step, result.status),
+        return_document=ReturnDocument.AFTER
+    )
+    if not doc:
+        current = await approvals.find_one({"requestId": result.requestId}, {"finalStatus": 1, "steps": 1})
+        if current is None:
+            return "error"
+        print(f"[Server] Ignoring duplicate result for ID {result.requestId}, Step {result.step}")
+        if needs_redispatch(result, current):
+            await outbox.enqueue_async(outbox_events, result.requestId)
+        return "ignored"
+
+    if after_step_result(result, doc):
+        await outbox.enqueue_async(outbox_events, result.requestId)
+    return "success"
+
+# -- Helper: 중복 결과 수신 시 다음 단계 전송을 다시 기록해야 하는지 확인 --
+# 단계 반영과 outbox 기록은 별도 쓰기라서 그 사이에 실패하거나 죽으면 재시도된 결과는 ignored가 되고
+# 다음 단계 전송이 유실됨 -> 이 결과로 승인된 단계의 바로 다음 단계가 아직 pending이면 다시 기록
+# (이미 전송된 경우에도 Processing Service 대기열은 requestId 기준이므로 중복 저장되지 않음)
+def needs_redispatch(result, doc):
+    if result.status != "approved" or doc.get('finalStatus') != "in_progress":
+        return False
+    steps = doc['steps']
+    for i, s in enumerate(steps):
+        if s['step'] == result.step:
+            if s['status'] == "approved" and i + 1 < len(steps) and steps[i + 1]['status'] == "pending":
+                print(f"[Server] Re-dispatching ID {result.requestId} to step {steps[i + 1]['step']}")
+                return True
+            return False
+    return False
+
+# 결과 반영 후 처리: 최종 결과 알림, 다음 단계로 넘겨야 하면 True 반환
+def after_step_result(result, doc):
+    # 2. 로직 분기: 반려(Rejected)인 경우 [cite: 86]
+    if doc['finalStatus'] == "rejected":
+        # Notification 호출 (가이드 3.2.4 - 2 & 3.4.2 반려 알림 구조) [cite: 88, 132-138]
+        notify_payload = {
+            "requestId": result.requestId,
+            "result": "rejected",
+            "rejectedBy": result.approverId, # 반려한 사람 ID
+            "finalResult": "rejected"
+        }
+        # Notification Service는 targetId(알림 받을 사람: 기안자)와 payload(메시지 내용)를 요구함
+        notifier.notify(doc['requesterId'], notify_payload)
         
-        # 최신 문서 다시 조회
-        doc = collection.find_one({"requestId": request.requestId})
-        if not doc:
-            return approval_pb2.ApprovalResultResponse(status="error")
+    # 3. 로직 분기: 승인(Approved)인 경우 [cite: 89]
+    elif result.status == "approved":
+        # 다음 단계(pending) 확인 [cite: 90] (변경 후 문서 기준)
+        next_step = None
+        for s in doc['steps']:
+            if s['status'] == 'pending':
+                next_step = s
+                break # 순차 진행이므로 첫 번째 pending만 찾으면 됨
         
-        # 2. 로직 분기: 반려(Rejected)인 경우 [cite: 86]
-        if request.status == "rejected":
-            collection.update_one(
-                {"requestId": request.requestId}, 
-                {"$set": {"finalStatus": "rejected", "updatedAt": datetime.datetime.now()}} # [cite: 87]
-            )
-            
-            # Notification 호출 (가이드 3.2.4 - 2 & 3.4.2 반려 알림 구조) [cite: 88, 132-138]
+        if next_step:
+            print(f"[Server] Moving to next step: {next_step['step']}")
+            return True
+        else:
+            # 모든 단계 완료 [cite: 93] (finalStatus는 위 update에서 이미 approved로 변경됨)
+            # Notification 호출 (가이드 3.2.4 - 3 & 3.4.2 승인 알림 구조) [cite: 95, 126-131]
             notify_payload = {
-                "requestId": request.requestId,
-                "result": "rejected",
-                "rejectedBy": request.approverId, # 반려한 사람 ID
-                "finalResult": "rejected"
+                "requestId": result.requestId,
+                "result": "approved",
+                "finalResult": "approved"
             }
+            notifier.notify(doc['requesterId'], notify_payload) # 알림 받을 사람 (기안자)
+
+    return False
+
+class RequestServicer(approval_pb2_grpc.ApprovalServicer):
+    # 가이드 3.2.4: Approval Processing Service로부터 ReturnApprovalResult 호출을 받음 [cite: 85]
+    def ReturnApprovalResult(self, request, context):
+        return approval_pb2.ApprovalResultResponse(status=handle_approval_result(request))
+
+    # 여러 결과를 한 번의 호출로 받아서 항목별 처리 결과를 반환
+    def ReturnApprovalResults(self, request, context):
+        outcomes = []
+        for result in request.results:
             try:
-                # Notification Service는 targetId와 payload를 요구함
-                requests.post(f"{NOTIFICATION_SERVICE_URL}/notify", json={
-                    "targetId": doc['requesterId'],  # 알림 받을 사람 (기안자)
-                    "payload": notify_payload        # 메시지 내용
-                })
+                status = handle_approval_result(result)
             except Exception as e:
-                print(f"Notification Service unavailable: {e}")
-            
-        # 3. 로직 분기: 승인(Approved)인 경우 [cite: 89]
-        elif request.status == "approved":
-            # 다음 단계(pending) 확인 [cite: 90]
-            next_step = None
-            for s in doc['steps']:
-                if s['status'] == 'pending':
-                    next_step = s
-                    break # 순차 진행이므로 첫 번째 pending만 찾으면 됨
-            
-            if next_step:
-                print(f"[Server] Moving to next step: {next_step['step']}")
-                # 다음 결재자에게 gRPC 전송 (재귀적 호출과 유사) [cite: 91]
-                send_to_processing(doc)
-            else:
-                # 모든 단계 완료 [cite: 93]
-                collection.update_one(
-                    {"requestId": request.requestId}, 
-                    {"$set": {"finalStatus": "approved", "updatedAt": datetime.datetime.now()}} # [cite: 94]
-                )
-                
-                # Notification 호출 (가이드 3.2.4 - 3 & 3.4.2 승인 알림 구조) [cite: 95, 126-131]
-                notify_payload = {
-                    "requestId": request.requestId,
-                    "result": "approved",
-                    "finalResult": "approved"
-                }
-                try:
-                    requests.post(f"{NOTIFICATION_SERVICE_URL}/notify", json={
-                        "targetId": doc['requesterId'], # 알림 받을 사람 (기안자)
-                        "payload": notify_payload       # 메시지 내용
-                    })
-                except Exception as e:
-                    print(f"Notification Service unavailable: {e}")
-
-        return approval_pb2.ApprovalResultResponse(status="success")
+                print(f"[Server] Failed to apply result for ID {result.requestId}: {e}")
+                status = "error"
+            outcomes.append(approval_pb2.ApprovalResultOutcome(
+                requestId=result.requestId, step=result.step, status=status
+            ))
+        return approval_pb2.ApprovalResultBatchResponse(results=outcomes)
+
+    # Processing Service의 장기 유지 스트림: 결과마다 처리 후 seq별 ack 반환
+    def StreamApprovalResults(self, request_iterator, context):
+        return stream_limiter.guard(context, serve_acked_stream(
+            request_iterator,
+            lambda envelope: handle_approval_result(envelope.result),
+            lambda seq, status: approval_pb2.StreamAck(seq=seq, status=status),
+            executor=result_executor
+        ))
+
+# grpc.aio 서버용 (GRPC_SERVER_MODE=aio): MongoDB 대기 중에는 이벤트 루프가 다른 결과를 처리
+class AsyncRequestServicer(approval_pb2_grpc.ApprovalServicer):
+    def __init__(self, async_db):
+        self.approvals = async_db[collection.name]
+        self.outbox_events = async_db[outbox_collection.name]
+
+    async def handle(self, result):
+        return await handle_approval_result_async(result, self.approvals, self.outbox_events)
+
+    async def ReturnApprovalResult(self, request, context):
+        return approval_pb2.ApprovalResultResponse(status=await self.handle(request))
+
+    # 일괄 결과는 항목별로 동시에 처리 (항목마다 다른 문서를 갱신)
+    async def ReturnApprovalResults(self, request, context):
+        statuses = await asyncio.gather(*(self.handle(r) for r in request.results), return_exceptions=True)
+        outcomes = []
+        for result, status in zip(request.results, statuses):
+            if isinstance(status, Exception):
+                print(f"[Server] Failed to apply result for ID {result.requestId}: {status}")
+                status = "error"
+            outcomes.append(approval_pb2.ApprovalResultOutcome(
+                requestId=result.requestId, step=result.step, status=status
+            ))
+        return approval_pb2.ApprovalResultBatchResponse(results=outcomes)
+
+    async def StreamApprovalResults(self, request_iterator, context):
+        async def handle(envelope):
+            return await self.handle(envelope.result)
+
+        async for ack in serve_acked_stream_async(
+            request_iterator, handle, lambda seq, status: approval_pb2.StreamAck(seq=seq, status=status)
+        ):
+            yield ack
 
 # -- Helper: User 존재 확인 --
-def check_user_exists(id):
+# 기안자와 모든 결재자를 확인하고, 존재하지 않는 ID 집합을 반환
+# 캐시에 없는 ID만 Employee Service에 한 번의 요청으로 조회
+def find_missing_users(ids):
+    ids = list(dict.fromkeys(ids))
     try:
-        res = requests.get(f"{EMPLOYEE_SERVICE_URL}/employees/{id}")
-        return res.status_code == 200
+        keys = {i: int(i) for i in ids}
+    except (TypeError, ValueError):
+        return set(ids)
+
+    missing = set()
+    unknown = []
+    for i in ids:
+        exists = employee_cache.get(keys[i])
+        if exists is None:
+            unknown.append(i)
+        elif not exists:
+            missing.add(i)
+    if not unknown:
+        return missing
+
+    try:
+        res = employee_http.post(f"{EMPLOYEE_SERVICE_URL}/employees/lookup",
+                                 json={"ids": [keys[i] for i in unknown]}, timeout=EMPLOYEE_LOOKUP_TIMEOUT)
+        if res.status_code != 200:
+            return missing | set(unknown)
+        found = {e['id'] for e in res.json()['employees']}
     except:
-        return False # Employee Service가 꺼져있으면 없는 것으로 처리
+        return missing | set(unknown) # Employee Service가 꺼져있으면 없는 것으로 처리 (캐시하지 않음)
+
+    for i in unknown:
+        if keys[i] in found:
+            employee_cache.set(keys[i], True)
+        else:
+            employee_cache.set(keys[i], False, ttl=EMPLOYEE_NEGATIVE_CACHE_TTL)
+            missing.add(i)
+    return missing
 
 # --- [Helper] MongoDB 문서 JSON 직렬화 ---
 def serialize_doc(doc):
@@ -158,30 +420,73 @@ def serialize_doc(doc):
         doc['updatedAt'] = doc['updatedAt'].isoformat()
     return doc
 
+# --- [목록 조회] 페이지네이션 / 필터 / 프로젝션 ---
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+LIST_SORT = [("createdAt", -1), ("requestId", -1)]  # 최신순 (createdAt 동률은 requestId로 구분)
+LIST_FIELDS = {"requestId", "requesterId", "title", "content", "steps", "finalStatus", "createdAt", "updatedAt"}
+SUMMARY_EXCLUDED = {"content": 0, "steps": 0}  # 목록 화면에서는 본문과 단계 정보 제외
+
+list_parser = reqparse.RequestParser()
+list_parser.add_argument('limit', type=int, location='args', default=DEFAULT_PAGE_SIZE)
+list_parser.add_argument('cursor', type=str, location='args')
+list_parser.add_argument('requesterId', type=int, location='args')
+list_parser.add_argument('approverId', type=int, location='args')
+list_parser.add_argument('finalStatus', type=str, location='args')
+list_parser.add_argument('view', type=str, location='args', choices=('full', 'summary'), default='full')
+list_parser.add_argument('fields', type=str, location='args')
+
+# -- Helper: keyset cursor 인코딩 (마지막 문서의 createdAt + requestId) --
+def encode_cursor(doc):
+    raw = json.dumps({"createdAt": doc['createdAt'].isoformat(), "requestId": doc['requestId']})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.datetime.fromisoformat(raw['createdAt']), int(raw['requestId'])
+
+# -- Helper: 목록 조회용 projection 생성 --
+def build_projection(view, fields):
+    if fields:
+        requested = {f.strip() for f in fields.split(',') if f.strip()}
+        unknown = requested - LIST_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        # cursor 생성을 위해 정렬 키는 항상 포함
+        projection = {f: 1 for f in requested | {"requestId", "createdAt"}}
+    elif view == 'summary':
+        projection = dict(SUMMARY_EXCLUDED)
+    else:
+        projection = {}
+    projection["_id"] = 0
+    return projection
+
 @api.route('/approvals')
 class Approval(Resource):
     def post(self):
         data = request.json
         requester_id = data.get('requesterId')
         
-        # 1. Employee Service 검증 [cite: 49]
-        if not check_user_exists(requester_id):
+        steps = data.get('steps')
+
+        # 1. Employee Service 검증 [cite: 49] (기안자 + 결재자 전체를 한 번에 조회)
+        missing = find_missing_users([requester_id] + [step.get('approverId') for step in steps])
+        if requester_id in missing:
             return {"message": f"Requester {requester_id} does not exist."}, 400
 
         cnt = 1
-        steps = data.get('steps')
         for step in steps:
             # 2. Steps 검증 [cite: 49]
             if not step['step'] == cnt:
                 return {"message": "Step Order Error. Steps must be sequential starting from 1."}, 400
             cnt += 1
-            if not check_user_exists(step['approverId']):
+            if step['approverId'] in missing:
                 return {"message": f"Approver {step['approverId']} does not exist."}, 400
             
             # 3. 초기 상태 pending 추가 [cite: 49]
             step['status'] = "pending"
 
-        req_id = int(datetime.datetime.now().timestamp())
+        req_id = id_allocator.next_id()
 
         doc = {
             "requestId": req_id,
@@ -193,21 +498,106 @@ class Approval(Resource):
             "createdAt": datetime.datetime.now()
         }
 
-        # 4. MongoDB INSERT [cite: 49]
-        collection.insert_one(doc) # insert_one을 명시적으로 호출하는 것이 좋습니다.
+        # 4. MongoDB INSERT [cite: 49] (outbox 이벤트와 함께 기록)
+        outbox.insert_approval(doc)
         print(f"Created Approval Request: {doc}")
 
         # 5. gRPC를 통해 Approval Processing Service 호출 [cite: 49]
-        # ★ 수정됨: client_grpc(X) -> send_to_processing(O)
-        send_to_processing(doc)
+        # 응답을 기다리지 않고 outbox 디스패처가 백그라운드에서 send_to_processing 호출
         
         return {"requestId": req_id}, 201
 
     def get(self):
-        # created_at 기준 내림차순 정렬 (최신순)
-        cursor = collection.find({}).sort("createdAt", -1)
-        results = [serialize_doc(doc) for doc in cursor]
-        return results, 200
+        """결재 목록 조회 (최신순, limit 단위 페이지, 다음 페이지 cursor는 X-Next-Cursor 헤더로 전달)"""
+        args = list_parser.parse_args()
+
+        limit = args['limit']
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            return {"message": f"'limit' must be between 1 and {MAX_PAGE_SIZE}."}, 400
+
+        try:
+            projection = build_projection(args['view'], args['fields'])
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        # 필터 조건
+        conditions = []
+        if args['requesterId'] is not None:
+            conditions.append({"requesterId": args['requesterId']})
+        if args['approverId'] is not None:
+            conditions.append({"steps.approverId": args['approverId']})
+        if args['finalStatus']:
+            conditions.append({"finalStatus": args['finalStatus']})
+
+        # keyset: 이전 페이지 마지막 문서보다 "오래된" 문서부터
+        if args['cursor']:
+            try:
+                created_at, last_id = decode_cursor(args['cursor'])
+            except Exception:
+                return {"message": "Invalid cursor."}, 400
+            conditions.append({"$or": [
+                {"createdAt": {"$lt": created_at}},
+                {"createdAt": created_at, "requestId": {"$lt": last_id}}
+            ]})
+
+        query = {"$and": conditions} if conditions else {}
+
+        # 다음 페이지 존재 여부 확인을 위해 limit + 1개 조회
+        docs = list(collection.find(query, projection).sort(LIST_SORT).limit(limit + 1))
+        headers = {}
+        if len(docs) > limit:
+            docs = docs[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(docs[-1])
+
+        results = [serialize_doc(doc) for doc in docs]
+        return results, 200, headers
+
+# --- [내보내기] NDJSON 스트리밍 ---
+DEFAULT_EXPORT_BATCH = 500
+MAX_EXPORT_BATCH = 5000
+EXPORT_SORT = [("createdAt", 1), ("requestId", 1)]  # 오래된 순 (목록 인덱스를 역방향으로 사용)
+
+export_parser = reqparse.RequestParser()
+export_parser.add_argument('from', dest='date_from', type=str, location='args')
+export_parser.add_argument('to', dest='date_to', type=str, location='args')
+export_parser.add_argument('finalStatus', type=str, location='args')
+export_parser.add_argument('batchSize', type=int, location='args', default=DEFAULT_EXPORT_BATCH)
+
+@api.route('/approvals/export')
+class ApprovalExport(Resource):
+    def get(self):
+        """createdAt 오름차순으로 한 줄에 문서 하나씩(NDJSON) 스트리밍 (from 포함, to 미포함)"""
+        args = export_parser.parse_args()
+
+        batch_size = args['batchSize']
+        if batch_size < 1 or batch_size > MAX_EXPORT_BATCH:
+            return {"message": f"'batchSize' must be between 1 and {MAX_EXPORT_BATCH}."}, 400
+
+        query = {}
+        created_range = {}
+        try:
+            if args['date_from']:
+                created_range["$gte"] = datetime.datetime.fromisoformat(args['date_from'])
+            if args['date_to']:
+                created_range["$lt"] = datetime.datetime.fromisoformat(args['date_to'])
+        except ValueError:
+            return {"message": "'from' and 'to' must be ISO 8601 dates."}, 400
+        if created_range:
+            query["createdAt"] = created_range
+        if args['finalStatus']:
+            query["finalStatus"] = args['finalStatus']
+
+        # 전체를 메모리에 올리지 않고 batch_size 단위로 읽으면서 바로 응답에 기록
+        cursor = collection.find(query, {"_id": 0}).sort(EXPORT_SORT).batch_size(batch_size)
+
+        def generate():
+            try:
+                for doc in cursor:
+                    yield json.dumps(serialize_doc(doc), ensure_ascii=False) + "\n"
+            finally:
+                cursor.close()
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 @api.route('/approvals/<int:request_id>')
 class ApprovalDetail(Resource):
@@ -229,21 +619,108 @@ class ApprovalDetail(Resource):
             "message": "Deletion is not allowed. The process ends only upon rejection."
         }, 405  # 405 Method Not Allowed 또는 400 Bad Request
 
+# --- [내부 API] 직원 캐시 관리 ---
+# Employee Service가 직원 수정/삭제 시 호출하여 캐시된 항목을 무효화
+@api.route('/internal/employee-cache/invalidate')
+class EmployeeCacheInvalidate(Resource):
+    def post(self):
+        data = request.json or {}
+        if data.get('all'):
+            employee_cache.clear()
+            return {"invalidated": "all"}, 200
+
+        ids = data.get('ids', [])
+        try:
+            keys = [int(i) for i in ids]
+        except (TypeError, ValueError):
+            return {"message": "'ids' must be a list of integers."}, 400
+        return {"invalidated": employee_cache.invalidate_many(keys)}, 200
+
+@api.route('/internal/employee-cache')
+class EmployeeCacheStats(Resource):
+    def get(self):
+        """캐시 크기 및 hit/miss 통계"""
+        return employee_cache.stats(), 200
+
+# 알림 전송 현황 (모니터링용)
+@api.route('/internal/notifications')
+class NotificationStats(Resource):
+    def get(self):
+        """대기 중인 알림 수 및 전송/실패/버림 건수"""
+        return notifier.stats(), 200
+
 # gRPC 서버 실행 함수
+grpc_server = None
+grpc_loop = None  # aio 모드에서 서버가 실행 중인 이벤트 루프
+
+async def serve_grpc_aio():
+    global grpc_server, grpc_loop
+    grpc_loop = asyncio.get_running_loop()
+    # AsyncMongoClient는 사용하는 이벤트 루프 안에서 생성
+    async_client = AsyncMongoClient(MONGO_URI)
+    server = grpc.aio.server(options=SERVER_KEEPALIVE_OPTIONS)
+    grpc_server = server
+    approval_pb2_grpc.add_ApprovalServicer_to_server(AsyncRequestServicer(async_client[MONGO_DB]), server)
+    server.add_insecure_port(f'[::]:{MY_GRPC_PORT}')
+    print(f"Approval Request Service (gRPC aio) started on port {MY_GRPC_PORT}...")
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        await async_client.close()
+
 def serve_grpc():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    global grpc_server
+    if GRPC_SERVER_MODE == "aio":
+        asyncio.run(serve_grpc_aio())
+        return
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=GRPC_MAX_STREAMS + GRPC_UNARY_WORKERS),
+                         options=SERVER_KEEPALIVE_OPTIONS)
+    grpc_server = server
     approval_pb2_grpc.add_ApprovalServicer_to_server(RequestServicer(), server)
     server.add_insecure_port(f'[::]:{MY_GRPC_PORT}')
     print(f"Approval Request Service (gRPC) started on port {MY_GRPC_PORT}...")
     server.start()
     server.wait_for_termination()
 
+# 종료 시 열려 있는 스트림을 끊어야 gRPC 워커 스레드가 끝나고 프로세스가 종료됨
+def stop_grpc(grace=1):
+    if grpc_server is None:
+        return
+    if grpc_loop is not None:
+        asyncio.run_coroutine_threadsafe(grpc_server.stop(grace), grpc_loop).result()
+    else:
+        grpc_server.stop(grace).wait()
+
 if __name__ == '__main__':
+    # 0. 기존 문서(타임스탬프 기반 requestId)와 겹치지 않도록 카운터 시작값 보정
+    last = collection.find_one({}, {"requestId": 1}, sort=[("requestId", -1)])
+    if last:
+        id_allocator.seed(last['requestId'])
+    # 예전 방식으로 생긴 중복 requestId를 새 ID로 정리 (unique 인덱스가 아직 없을 때 1회)
+    rekey_duplicate_request_ids(collection, id_allocator.next_id, outbox.enqueue)
+
+    # 인덱스 생성 및 hot query 실행 계획 검증 (COLLSCAN이면 기동 실패)
+    ensure_indexes(collection, outbox_collection)
+    verify_query_plans(collection, outbox_collection)
+
     # 1. gRPC 서버 스레드 실행
     t = threading.Thread(target=serve_grpc)
     t.daemon = True # 메인 프로세스 종료 시 함께 종료되도록 설정
     t.start()
+
+    # outbox 디스패처 실행 (Processing Service 전달 담당)
+    outbox.start()
+    notifier.start()
     
     # 2. Flask 웹 서버 실행
     # use_reloader=False 필수 (스레드 중복 실행 방지)
-    app.run(port=5002, debug=True, use_reloader=False)
\ No newline at end of file
+    app.run(port=5002, debug=True, use_reloader=False)
+
+    # 3. 종료 처리
+    outbox.stop()
+    for stream in processing_streams.values():
+        stream.close()
+    stop_grpc()
+    # gRPC 결과 처리가 끝난 뒤 남은 알림을 모두 전송하고 종료
+    notifier.stop()
\ No newline at end of file
@@ -0,0 +1,59 @@
+import threading
+import time
+
+from pymongo import ReturnDocument
+
+INT32_MAX = 2 ** 31 - 1  # proto의 requestId는 int32
+
+
+class RequestIdAllocator:
+    """MongoDB 카운터 문서 기반 단조 증가 requestId 발급기
+
+    counters 컬렉션의 seq를 $inc로 block_size만큼 한 번에 예약하고,
+    예약한 구간 안에서는 DB 왕복 없이 메모리에서 발급한다.
+    여러 프로세스가 같은 카운터를 써도 예약 구간이 겹치지 않으므로 충돌이 없다.
+    (프로세스 재시작 시 사용하지 않은 구간은 건너뛰므로 ID에 빈 번호가 생길 수 있음)
+    """
+
+    def __init__(self, counters, name="approvals.requestId", block_size=100, max_block_size=5000):
+        self.counters = counters
+        self.name = name
+        self.block_size = block_size
+        self.max_block_size = max_block_size
+        self._lock = threading.Lock()
+        self._next = 1
+        self._end = 0  # 예약 구간 [_next, _end], _next > _end 이면 새로 예약 필요
+        self._reserved_at = 0.0
+
+    def seed(self, floor):
+        # 카운터가 floor보다 작으면 끌어올림 (기존 문서의 requestId와 겹치지 않도록)
+        self.counters.update_one({"_id": self.name}, {"$max": {"seq": int(floor)}}, upsert=True)
+
+    def _reserve(self):
+        # 직전 구간을 1초 안에 다 썼으면 다음 예약 크기를 두 배로 (고부하 시 왕복 횟수 감소)
+        now = time.monotonic()
+        if self._end and now - self._reserved_at < 1.0:
+            self.block_size = min(self.block_size * 2, self.max_block_size)
+
+        doc = self.counters.find_one_and_update(
+            {"_id": self.name},
+            {"$inc": {"seq": self.block_size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        end = doc['seq']
+        start = end - self.block_size + 1
+        if start > INT32_MAX:
+            raise OverflowError("requestId counter exceeded int32 range")
+
+        self._next = start
+        self._end = min(end, INT32_MAX)
+        self._reserved_at = now
+
+    def next_id(self):
+        with self._lock:
+            if self._next > self._end:
+                self._reserve()
+            req_id = self._next
+            self._next += 1
+            return req_id
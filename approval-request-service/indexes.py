@@ -0,0 +1,149 @@
+import datetime
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient
+from pymongo.errors import OperationFailure
+
+DUPLICATE_KEY = 11000  # unique 인덱스 생성 시 중복 값이 있으면 발생하는 에러 코드
+
+# --- [인덱스 정의] approvals 컬렉션 ---
+# 목록 조회는 (createdAt, requestId) 내림차순 keyset 정렬을 사용하므로 필터 인덱스 뒤에 정렬 키를 붙임
+APPROVAL_INDEXES = [
+    IndexModel([("requestId", ASCENDING)], name="uniq_requestId", unique=True),
+    IndexModel([("createdAt", DESCENDING), ("requestId", DESCENDING)], name="createdAt_requestId"),
+    IndexModel([("requesterId", ASCENDING), ("createdAt", DESCENDING), ("requestId", DESCENDING)],
+               name="requesterId_createdAt"),
+    IndexModel([("steps.approverId", ASCENDING), ("createdAt", DESCENDING), ("requestId", DESCENDING)],
+               name="approverId_createdAt"),
+    IndexModel([("finalStatus", ASCENDING), ("createdAt", DESCENDING), ("requestId", DESCENDING)],
+               name="finalStatus_createdAt"),
+]
+
+# --- [인덱스 정의] approval_outbox 컬렉션 (디스패처 배치 점유용) ---
+OUTBOX_INDEXES = [
+    IndexModel([("status", ASCENDING), ("nextAttemptAt", ASCENDING)], name="status_nextAttemptAt"),
+    IndexModel([("status", ASCENDING), ("leaseUntil", ASCENDING)], name="status_leaseUntil"),
+    IndexModel([("claimToken", ASCENDING)], name="claimToken", sparse=True),
+]
+
+
+def duplicate_request_ids(approvals, limit=None):
+    """requestId가 같은 문서 묶음: [(requestId, [_id, ...] 오래된 순), ...]"""
+    pipeline = [
+        {"$sort": {"createdAt": ASCENDING, "_id": ASCENDING}},
+        {"$group": {"_id": "$requestId", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$sort": {"_id": ASCENDING}},
+    ]
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    return [(group["_id"], group["ids"]) for group in approvals.aggregate(pipeline, allowDiskUse=True)]
+
+
+def rekey_duplicate_request_ids(approvals, next_id, redispatch):
+    """[1회성 마이그레이션] 초 단위 타임스탬프로 requestId를 만들던 시절의 중복 requestId 정리
+
+    uniq_requestId 인덱스가 아직 없을 때만 실행: 묶음마다 가장 오래된 문서는 그대로 두고
+    나머지는 next_id()로 새 requestId를 발급해서 바꿈 (카운터는 미리 기존 최댓값 이상으로 seed 되어 있어야 함)
+    진행 중인 문서는 새 requestId로 다시 전송해야 하므로 redispatch(newRequestId) 호출
+    반환: [(이전 requestId, 새 requestId), ...]
+    """
+    if "uniq_requestId" in approvals.index_information():
+        return []
+
+    rekeyed = []
+    for request_id, ids in duplicate_request_ids(approvals):
+        for _id in ids[1:]:
+            new_id = next_id()
+            doc = approvals.find_one_and_update({"_id": _id}, {"$set": {"requestId": new_id}},
+                                                projection={"finalStatus": 1})
+            rekeyed.append((request_id, new_id))
+            print(f"[Migration] Duplicate requestId {request_id}: document {_id} re-keyed to {new_id}")
+            if doc is not None and doc.get("finalStatus") == "in_progress":
+                redispatch(new_id)
+    if rekeyed:
+        print(f"[Migration] Re-keyed {len(rekeyed)} approvals with duplicate requestIds")
+    return rekeyed
+
+
+def ensure_indexes(approvals, outbox):
+    """필요한 인덱스 생성 (이미 있으면 무시됨)
+
+    중복 requestId가 남아 있으면 unique 인덱스를 만들 수 없으므로 중복 목록과 함께 RuntimeError 발생
+    (서비스 기동 시 rekey_duplicate_request_ids가 먼저 정리함)
+    """
+    try:
+        created = approvals.create_indexes(APPROVAL_INDEXES)
+    except OperationFailure as e:
+        if e.code != DUPLICATE_KEY:
+            raise
+        duplicates = duplicate_request_ids(approvals, limit=20)
+        listed = ", ".join(f"{request_id} (x{len(ids)})" for request_id, ids in duplicates)
+        raise RuntimeError(
+            f"Cannot create unique index on approvals.requestId: duplicate requestIds found: {listed}. "
+            "Start approval-request-service (app.py) to re-key them automatically, "
+            "or give the newer documents new requestIds and retry."
+        ) from e
+    created += outbox.create_indexes(OUTBOX_INDEXES)
+    print(f"[Index] Ensured indexes: {', '.join(created)}")
+    return created
+
+
+# -- Helper: explain 결과의 winningPlan에서 stage 이름 수집 --
+def _plan_stages(plan):
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        for key, value in plan.items():
+            if key != 'stage':
+                stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+def hot_queries(approvals, outbox):
+    """서비스에서 자주 실행되는 쿼리 목록: (이름, cursor)"""
+    list_sort = [("createdAt", DESCENDING), ("requestId", DESCENDING)]
+    now = datetime.datetime.now()
+    return [
+        ("find_one by requestId", approvals.find({"requestId": 1}).limit(1)),
+        ("update step by requestId", approvals.find({"requestId": 1, "steps.step": 1}).limit(1)),
+        ("outbox batch by requestId", approvals.find({"requestId": {"$in": [1, 2]}})),
+        ("list latest", approvals.find({}).sort(list_sort).limit(100)),
+        ("list by requesterId", approvals.find({"requesterId": 1}).sort(list_sort).limit(100)),
+        ("list by approverId", approvals.find({"steps.approverId": 1}).sort(list_sort).limit(100)),
+        ("list by finalStatus", approvals.find({"finalStatus": "in_progress"}).sort(list_sort).limit(100)),
+        ("export by date range", approvals.find({"createdAt": {"$gte": now}})
+            .sort([("createdAt", ASCENDING), ("requestId", ASCENDING)])),
+        ("export by finalStatus", approvals.find({"finalStatus": "approved", "createdAt": {"$gte": now}})
+            .sort([("createdAt", ASCENDING), ("requestId", ASCENDING)])),
+        ("outbox due events", outbox.find({"$or": [
+            {"status": "pending", "nextAttemptAt": {"$lte": now}},
+            {"status": "dispatching", "leaseUntil": {"$lte": now}}
+        ]}).sort("nextAttemptAt", ASCENDING).limit(50)),
+        ("outbox claimed events", outbox.find({"claimToken": "x", "status": "dispatching"})),
+    ]
+
+
+def verify_query_plans(approvals, outbox):
+    """hot query 중 COLLSCAN으로 실행되는 것이 있으면 RuntimeError 발생"""
+    offenders = []
+    for name, cursor in hot_queries(approvals, outbox):
+        plan = cursor.explain()['queryPlanner']['winningPlan']
+        stages = _plan_stages(plan)
+        if 'COLLSCAN' in stages:
+            offenders.append(f"{name} ({' <- '.join(stages)})")
+
+    if offenders:
+        raise RuntimeError("Hot queries are doing collection scans: " + "; ".join(offenders))
+    print("[Index] Query plan check passed (no COLLSCAN in hot queries)")
+
+
+if __name__ == '__main__':
+    # 단독 실행: 인덱스 생성 + 실행 계획 검증
+    client = MongoClient('mongodb://localhost:27017/')
+    db = client['erp_db']
+    ensure_indexes(db['approvals'], db['approval_outbox'])
+    verify_query_plans(db['approvals'], db['approval_outbox'])
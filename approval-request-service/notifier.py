@@ -0,0 +1,107 @@
+import queue
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class NotificationDispatcher:
+    """Notification Service 호출을 백그라운드 큐로 넘겨서 처리
+
+    - keep-alive 세션(커넥션 풀) 재사용
+    - 워커 수만큼만 동시 전송 (bounded concurrency)
+    - 연결 오류 / 5xx 응답은 지수 백오프로 재시도
+    - 큐가 가득 차면 알림을 버리고 로그만 남김 (결재 처리 흐름은 막지 않음)
+    """
+
+    def __init__(self, base_url, workers=4, queue_size=10000,
+                 timeout=(2, 5), max_retries=3, backoff=0.5):
+        self.url = f"{base_url}/notify"
+        self.workers = workers
+        self.timeout = timeout  # (connect, read) 초
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        # 요청 스레드(notify)와 워커 스레드가 함께 갱신하므로 lock 안에서만 증가
+        self._stats_lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def notify(self, target_id, payload):
+        """알림 전송 예약 (즉시 반환), 큐가 가득 찬 경우 False"""
+        try:
+            self._queue.put_nowait({"targetId": target_id, "payload": payload})
+            return True
+        except queue.Full:
+            self._count("dropped")
+            print(f"[Notify] Queue full. Dropping notification for {target_id}")
+            return False
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _send(self, message):
+        for attempt in range(self.max_retries + 1):
+            try:
+                res = self.session.post(self.url, json=message, timeout=self.timeout)
+                if res.status_code < 500:
+                    self._count("sent")
+                    return True
+                error = f"HTTP {res.status_code}"
+            except requests.RequestException as e:
+                error = e
+
+            if attempt < self.max_retries:
+                # 지수 백오프 + jitter (동시에 재시도가 몰리지 않도록)
+                time.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+
+        self._count("failed")
+        print(f"Notification Service unavailable: {error}")
+        return False
+
+    def _worker(self):
+        while True:
+            message = self._queue.get()
+            if message is None:
+                self._queue.task_done()
+                return
+            try:
+                self._send(message)
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        if self._threads:
+            return
+        for _ in range(self.workers):
+            t = threading.Thread(target=self._worker, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        # 남은 알림을 모두 보낸 뒤 워커 종료
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "sent": self.sent,
+                "failed": self.failed,
+                "dropped": self.dropped
+            }
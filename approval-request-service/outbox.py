@@ -0,0 +1,191 @@
+import datetime
+import threading
+import uuid
+from concurrent import futures
+
+from pymongo.errors import OperationFailure
+
+# outbox 이벤트 상태
+OUTBOX_PENDING = "pending"          # 전송 대기
+OUTBOX_DISPATCHING = "dispatching"  # 디스패처가 점유(lease)하여 전송 중
+OUTBOX_FAILED = "failed"            # 재시도 한도 초과 (수동 확인 필요)
+
+# standalone MongoDB에서 트랜잭션 사용 시 발생하는 에러 코드 (IllegalOperation)
+TRANSACTION_NOT_SUPPORTED = 20
+
+
+class ApprovalOutbox:
+    """approval 문서와 함께 기록되는 outbox 컬렉션 + 백그라운드 디스패처
+
+    POST /approvals는 문서와 outbox 이벤트를 기록한 뒤 바로 응답하고,
+    실제 Processing Service 전달은 디스패처 워커 풀이 배치 단위로 처리한다.
+    """
+
+    def __init__(self, client, approvals, outbox, send_fn,
+                 batch_size=50, workers=4, poll_interval=1.0,
+                 lease_seconds=30, max_attempts=10, missing_grace_seconds=30):
+        self.client = client
+        self.approvals = approvals
+        self.outbox = outbox
+        self.send_fn = send_fn  # send_fn(approval_doc): 실패 시 예외 발생
+        self.batch_size = batch_size
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = datetime.timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.missing_grace = datetime.timedelta(seconds=missing_grace_seconds)
+
+        self._transactions = None  # 최초 기록 시 트랜잭션 지원 여부 확인
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    # -- Helper: outbox 이벤트 문서 생성 --
+    def _new_event(self, request_id, event_type):
+        now = datetime.datetime.now()
+        return {
+            "requestId": request_id,
+            "type": event_type,
+            "status": OUTBOX_PENDING,
+            "attempts": 0,
+            "createdAt": now,
+            "nextAttemptAt": now
+        }
+
+    # --- [기록] approval 문서 + outbox 이벤트 ---
+    def insert_approval(self, doc):
+        event = self._new_event(doc['requestId'], "request_approval")
+
+        if self._transactions is not False:
+            try:
+                with self.client.start_session() as session:
+                    with session.start_transaction():
+                        self.approvals.insert_one(doc, session=session)
+                        self.outbox.insert_one(event, session=session)
+                self._transactions = True
+                self.wakeup()
+                return
+            except OperationFailure as e:
+                if e.code != TRANSACTION_NOT_SUPPORTED:
+                    raise
+                print("[Outbox] Transactions not supported (standalone MongoDB). Falling back to ordered writes.")
+                self._transactions = False
+
+        # 트랜잭션 미지원: outbox를 먼저 기록해야 dispatch 유실이 없음
+        # (문서 INSERT 전에 죽으면 디스패처가 문서 없는 이벤트를 유예 시간 후 폐기)
+        self.outbox.insert_one(event)
+        self.approvals.insert_one(doc)
+        self.wakeup()
+
+    def enqueue(self, request_id, event_type="request_approval"):
+        # 이미 저장된 문서에 대한 전송 이벤트만 추가 (다음 단계 전달 등)
+        self.outbox.insert_one(self._new_event(request_id, event_type))
+        self.wakeup()
+
+    async def enqueue_async(self, async_outbox, request_id, event_type="request_approval"):
+        # grpc.aio 서버용 enqueue: async_outbox는 같은 컬렉션의 AsyncMongoClient 컬렉션 객체
+        await async_outbox.insert_one(self._new_event(request_id, event_type))
+        self.wakeup()
+
+    def wakeup(self):
+        self._wakeup.set()
+
+    # --- [디스패처] 배치 점유 -> 전송 -> 결과 반영 ---
+    def _claim_batch(self):
+        now = datetime.datetime.now()
+        due = {"$or": [
+            {"status": OUTBOX_PENDING, "nextAttemptAt": {"$lte": now}},
+            {"status": OUTBOX_DISPATCHING, "leaseUntil": {"$lte": now}}  # 죽은 디스패처의 lease 회수
+        ]}
+        ids = [e["_id"] for e in self.outbox.find(due, {"_id": 1}).sort("nextAttemptAt", 1).limit(self.batch_size)]
+        if not ids:
+            return []
+
+        # 여러 프로세스가 동시에 돌 수 있으므로 claimToken으로 내가 점유한 것만 가져옴
+        token = uuid.uuid4().hex
+        self.outbox.update_many(
+            {"_id": {"$in": ids}, **due},
+            {"$set": {"status": OUTBOX_DISPATCHING, "claimToken": token, "leaseUntil": now + self.lease}}
+        )
+        return list(self.outbox.find({"claimToken": token, "status": OUTBOX_DISPATCHING}))
+
+    def _backoff(self, attempts):
+        return datetime.timedelta(seconds=min(2 ** attempts, 300))
+
+    def _mark_failed(self, event, error):
+        attempts = event.get("attempts", 0) + 1
+        update = {"attempts": attempts, "lastError": str(error)}
+        if attempts >= self.max_attempts:
+            update["status"] = OUTBOX_FAILED
+            print(f"[Outbox] Giving up on request {event['requestId']} after {attempts} attempts: {error}")
+        else:
+            update["status"] = OUTBOX_PENDING
+            update["nextAttemptAt"] = datetime.datetime.now() + self._backoff(attempts)
+        self.outbox.update_one({"_id": event["_id"]}, {"$set": update, "$unset": {"claimToken": "", "leaseUntil": ""}})
+
+    def drain_once(self):
+        """대기 중인 이벤트 한 배치를 전송하고 처리한 개수를 반환"""
+        events = self._claim_batch()
+        if not events:
+            return 0
+
+        # 배치에 해당하는 approval 문서를 한 번에 조회 (전송 시점의 최신 상태 사용)
+        request_ids = list({e["requestId"] for e in events})
+        docs = {d["requestId"]: d for d in self.approvals.find({"requestId": {"$in": request_ids}})}
+
+        done = []
+        jobs = {}
+        now = datetime.datetime.now()
+        for event in events:
+            doc = docs.get(event["requestId"])
+            if doc is None:
+                # 트랜잭션 미지원 환경에서는 문서 INSERT가 아직 안 끝났을 수 있음
+                if now - event["createdAt"] < self.missing_grace:
+                    self._mark_failed(event, "approval document not found yet")
+                else:
+                    print(f"[Outbox] Dropping event for missing request {event['requestId']}")
+                    done.append(event["_id"])
+                continue
+            jobs[self._executor.submit(self.send_fn, doc)] = event
+
+        for future in futures.as_completed(jobs):
+            event = jobs[future]
+            try:
+                future.result()
+                done.append(event["_id"])
+            except Exception as e:
+                print(f"[Outbox] Dispatch failed for request {event['requestId']}: {e}")
+                self._mark_failed(event, e)
+
+        if done:
+            self.outbox.delete_many({"_id": {"$in": done}})
+        return len(events)
+
+    def _run(self):
+        print(f"[Outbox] Dispatcher started (workers={self.workers}, batch={self.batch_size})")
+        while not self._stop.is_set():
+            try:
+                if self.drain_once() > 0:
+                    continue  # 밀린 이벤트가 더 있을 수 있으므로 바로 다음 배치
+            except Exception as e:
+                print(f"[Outbox] Dispatcher error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._executor = futures.ThreadPoolExecutor(max_workers=self.workers)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
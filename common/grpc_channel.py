@@ -0,0 +1,129 @@
+import threading
+import grpc
+
+# --- [설정] Keepalive 옵션 ---
+# 클라이언트: 유휴 상태에서도 주기적으로 ping을 보내 끊어진 연결을 빠르게 감지
+CLIENT_KEEPALIVE_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+]
+
+# 서버: 위 클라이언트 ping을 허용하지 않으면 GOAWAY(too_many_pings)로 연결이 끊김
+SERVER_KEEPALIVE_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.min_ping_interval_without_data_ms', 10000),
+    ('grpc.http2.max_pings_without_data', 0),
+]
+
+# 재연결 후 재시도할 gRPC 상태 코드
+RECONNECT_CODES = (grpc.StatusCode.UNAVAILABLE,)
+
+
+class ManagedChannel:
+    """하나의 target에 대한 장기 유지 채널 + stub (스레드 간 공유)"""
+
+    def __init__(self, target, stub_class, options=None):
+        self.target = target
+        self.stub_class = stub_class
+        self.options = options if options is not None else CLIENT_KEEPALIVE_OPTIONS
+        self._lock = threading.Lock()
+        self._channel = None
+        self._stub = None
+        self._state = None
+
+    def _on_state_change(self, state):
+        self._state = state
+
+    def stub(self):
+        # 최초 사용 시점에 채널 생성 (lazy connect)
+        with self._lock:
+            if self._channel is None:
+                print(f"[gRPC Pool] Opening channel to {self.target}")
+                self._channel = grpc.insecure_channel(self.target, options=self.options)
+                self._channel.subscribe(self._on_state_change, try_to_connect=True)
+                self._stub = self.stub_class(self._channel)
+            return self._stub
+
+    def reset(self):
+        # 채널을 닫고 다음 호출 때 새로 연결하도록 비워둠
+        with self._lock:
+            channel = self._channel
+            self._channel = None
+            self._stub = None
+            self._state = None
+        if channel is not None:
+            print(f"[gRPC Pool] Resetting channel to {self.target}")
+            try:
+                channel.unsubscribe(self._on_state_change)
+            except Exception:
+                pass
+            channel.close()
+
+    def state(self):
+        # 구독 콜백으로 추적 중인 connectivity 상태 (채널이 없으면 None)
+        return self._state
+
+    def is_healthy(self, timeout=1.0):
+        """채널이 READY 상태가 될 때까지 최대 timeout초 대기"""
+        self.stub()
+        with self._lock:
+            channel = self._channel
+        if channel is None:
+            return False
+        try:
+            grpc.channel_ready_future(channel).result(timeout=timeout)
+            return True
+        except grpc.FutureTimeoutError:
+            return False
+
+    def call(self, method, request, timeout=None, retries=1):
+        # UNAVAILABLE 발생 시 채널을 재생성한 뒤 retries 횟수만큼 재시도
+        attempt = 0
+        while True:
+            stub = self.stub()
+            try:
+                return getattr(stub, method)(request, timeout=timeout)
+            except grpc.RpcError as e:
+                if e.code() in RECONNECT_CODES and attempt < retries:
+                    attempt += 1
+                    self.reset()
+                    continue
+                raise
+
+    def close(self):
+        self.reset()
+
+
+class GrpcChannelManager:
+    """target(host:port)별 ManagedChannel을 하나씩만 생성해서 재사용"""
+
+    def __init__(self, stub_class, options=None):
+        self.stub_class = stub_class
+        self.options = options
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def get(self, target):
+        with self._lock:
+            channel = self._channels.get(target)
+            if channel is None:
+                channel = ManagedChannel(target, self.stub_class, self.options)
+                self._channels[target] = channel
+            return channel
+
+    def health(self):
+        # { target: connectivity 상태 이름 } (모니터링용)
+        with self._lock:
+            channels = list(self._channels.values())
+        return {c.target: (c.state().name if c.state() else "IDLE") for c in channels}
+
+    def close(self):
+        with self._lock:
+            channels = list(self._channels.values())
+            self._channels.clear()
+        for channel in channels:
+            channel.close()
@@ -0,0 +1,263 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent import futures
+
+import grpc
+
+
+class StreamUnsupported(Exception):
+    """상대 서버가 스트리밍 RPC를 지원하지 않거나(UNIMPLEMENTED) 스트림 수 한도 초과(RESOURCE_EXHAUSTED) -> 단건 RPC로 대체"""
+
+
+class StreamClosed(Exception):
+    """ack를 받기 전에 스트림이 끊김"""
+
+
+class _StreamState:
+    def __init__(self):
+        self.outbox = queue.Queue()  # 전송할 envelope (None이면 스트림 종료)
+        self.pending = {}            # seq -> Future (ack 대기)
+        self.closed = False
+
+    def requests(self):
+        while True:
+            item = self.outbox.get()
+            if item is None:
+                return
+            yield item
+
+
+class AckedStream:
+    """장기 유지 bidirectional 스트림 클라이언트 (메시지별 ack + 흐름 제어)
+
+    - 최초 전송 시 스트림을 열고, 끊기면 다음 전송 때 다시 연다 (lazy reconnect)
+    - 각 메시지에 seq를 붙여 보내고 같은 seq의 ack가 오면 해당 Future를 완료
+    - ack를 받지 못한 메시지는 최대 window개까지만 허용 (초과 시 전송 대기)
+    - 상대가 UNIMPLEMENTED / RESOURCE_EXHAUSTED(스트림 수 한도 초과)를 반환하면
+      retry_unsupported초 동안 StreamUnsupported 발생
+    """
+
+    def __init__(self, channel, method, wrap, window=64, retry_unsupported=60):
+        self.channel = channel  # grpc_channel.ManagedChannel
+        self.method = method
+        self.wrap = wrap        # wrap(seq, message) -> envelope
+        self.retry_unsupported = retry_unsupported
+        self._window = threading.BoundedSemaphore(window)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._state = None
+        self._unsupported_until = 0.0
+
+    def _open(self):
+        # self._lock 안에서 호출
+        state = _StreamState()
+        call = getattr(self.channel.stub(), self.method)(state.requests())
+        threading.Thread(target=self._read_acks, args=(call, state), daemon=True).start()
+        self._state = state
+        print(f"[gRPC Stream] Opened {self.method} to {self.channel.target}")
+        return state
+
+    def _read_acks(self, call, state):
+        error = StreamClosed(f"{self.method} stream closed")
+        try:
+            for ack in call:
+                with self._lock:
+                    future = state.pending.pop(ack.seq, None)
+                # abandon()으로 취소된 Future면 건너뜀 (취소와 ack 도착이 겹쳐도 한쪽만 반영)
+                if future is not None and future.set_running_or_notify_cancel():
+                    future.set_result(ack.status)
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                self._unsupported_until = time.monotonic() + self.retry_unsupported
+                error = StreamUnsupported(f"{self.method} is not implemented by {self.channel.target}")
+            elif e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+                self._unsupported_until = time.monotonic() + self.retry_unsupported
+                error = StreamUnsupported(f"{self.method} stream limit reached at {self.channel.target}")
+                print(f"[gRPC Stream] {self.channel.target} refused {self.method}: {e.details()}")
+            else:
+                error = StreamClosed(f"{self.method} stream failed: {e.code().name}")
+                print(f"[gRPC Stream] {self.method} to {self.channel.target} failed: {e.code().name}")
+                if e.code() == grpc.StatusCode.UNAVAILABLE:
+                    # 재연결 backoff를 기다리지 않고 다음 전송 때 새 채널로 연결
+                    self.channel.reset()
+
+        # 스트림 종료: 현재 스트림에서 분리하고 ack 대기 중인 메시지는 모두 실패 처리
+        with self._lock:
+            if self._state is state:
+                self._state = None
+            state.closed = True
+            pending = list(state.pending.values())
+            state.pending.clear()
+        state.outbox.put(None)  # request 생성기 종료
+        for future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    def submit(self, message, timeout=None):
+        """메시지 전송 후 ack status를 결과로 가지는 Future 반환"""
+        if time.monotonic() < self._unsupported_until:
+            raise StreamUnsupported(f"{self.method} is not implemented by {self.channel.target}")
+
+        # 흐름 제어: ack 대기 메시지가 window개면 자리가 날 때까지 대기
+        if not self._window.acquire(timeout=timeout):
+            raise futures.TimeoutError(f"{self.method} flow-control window is full")
+        future = futures.Future()
+        future.add_done_callback(lambda f: self._window.release())
+        try:
+            with self._lock:
+                state = self._state or self._open()
+                self._seq += 1
+                state.pending[self._seq] = future
+                state.outbox.put(self.wrap(self._seq, message))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def send(self, message, timeout=None):
+        """메시지를 보내고 ack status 반환 (timeout 초과 시 TimeoutError)"""
+        future = self.submit(message, timeout=timeout)
+        try:
+            return future.result(timeout=timeout)
+        except futures.TimeoutError:
+            self.abandon(future)
+            raise
+
+    def abandon(self, future):
+        """ack를 더 기다리지 않을 메시지 포기: pending에서 빼고 취소 -> done callback으로 window 자리 반납
+
+        (ack 없이 timeout된 메시지가 window를 계속 차지하지 않도록, 늦게 도착한 ack는 무시됨)
+        """
+        with self._lock:
+            state = self._state
+            if state is not None:
+                for seq, pending in list(state.pending.items()):
+                    if pending is future:
+                        del state.pending[seq]
+                        break
+        future.cancel()
+
+    def close(self):
+        # half-close: 이미 보낸 메시지의 ack는 계속 수신
+        with self._lock:
+            state = self._state
+            self._state = None
+        if state is not None:
+            state.outbox.put(None)
+
+
+class StreamLimiter:
+    """thread 모드 gRPC 서버에서 동시에 열려 있는 장기 스트림 수 제한
+
+    스트림은 열려 있는 동안 서버 워커 스레드 하나를 계속 점유하므로, 스레드 풀을
+    limit + (단건 RPC용 여유분)으로 만들고 limit을 넘는 스트림은 RESOURCE_EXHAUSTED로 거절한다
+    (클라이언트 AckedStream은 이 경우 단건 RPC로 대체)
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def active(self):
+        with self._lock:
+            return self._active
+
+    def guard(self, context, responses):
+        """responses(응답 생성기)를 스트림 한도 안에서 실행 (자리 확보는 첫 응답을 읽을 때 = 워커 스레드에서)"""
+        with self._lock:
+            admitted = self._active < self.limit
+            if admitted:
+                self._active += 1
+        if not admitted:
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,
+                          f"Too many open streams (limit {self.limit}), use unary RPCs")
+        try:
+            yield from responses
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+def serve_acked_stream(request_iterator, handle, make_ack, executor=None):
+    """서버 측 스트림 처리: envelope마다 handle(envelope)을 실행하고 ack를 yield
+
+    executor가 주어지면 메시지를 병렬로 처리하고 완료된 순서대로 ack를 보낸다
+    (ack는 seq로 매칭되므로 순서가 바뀌어도 무방). handle에서 예외가 나면 status="error".
+    """
+    def run(envelope):
+        try:
+            return make_ack(envelope.seq, handle(envelope))
+        except Exception as e:
+            print(f"[gRPC Stream] Failed to handle message {envelope.seq}: {e}")
+            return make_ack(envelope.seq, "error")
+
+    if executor is None:
+        for envelope in request_iterator:
+            yield run(envelope)
+        return
+
+    acks = queue.Queue()
+    done = object()
+
+    def pump():
+        inflight = []
+        try:
+            for envelope in request_iterator:
+                inflight.append(executor.submit(lambda e=envelope: acks.put(run(e))))
+                inflight = [f for f in inflight if not f.done()]
+        except grpc.RpcError:
+            pass  # 클라이언트 연결 종료
+        finally:
+            futures.wait(inflight)
+            acks.put(done)
+
+    threading.Thread(target=pump, daemon=True).start()
+    while True:
+        ack = acks.get()
+        if ack is done:
+            return
+        yield ack
+
+
+async def serve_acked_stream_async(request_iterator, handle, make_ack):
+    """grpc.aio 서버용 serve_acked_stream: handle은 coroutine 함수
+
+    메시지마다 task를 만들어 동시에 처리하고 완료된 순서대로 ack를 yield
+    (동시 처리 개수는 클라이언트 AckedStream의 window로 제한됨)
+    """
+    acks = asyncio.Queue()
+    done = object()
+
+    async def run(envelope):
+        try:
+            status = await handle(envelope)
+        except Exception as e:
+            print(f"[gRPC Stream] Failed to handle message {envelope.seq}: {e}")
+            status = "error"
+        acks.put_nowait(make_ack(envelope.seq, status))
+
+    async def pump():
+        tasks = set()
+        try:
+            async for envelope in request_iterator:
+                task = asyncio.ensure_future(run(envelope))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except grpc.RpcError:
+            pass  # 클라이언트 연결 종료
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            acks.put_nowait(done)
+
+    reader = asyncio.ensure_future(pump())
+    try:
+        while True:
+            ack = await acks.get()
+            if ack is done:
+                return
+            yield ack
+    finally:
+        reader.cancel()
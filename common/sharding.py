@@ -0,0 +1,66 @@
+import bisect
+import hashlib
+import os
+from collections import namedtuple
+
+# 샤드 하나: gRPC 수신 주소 + REST(Flask) 주소
+Shard = namedtuple("Shard", ["grpc_target", "http_url"])
+
+# --- [설정] Processing Service 샤드 목록 ---
+# PROCESSING_SHARDS="localhost:50051=http://localhost:5003,localhost:50061=http://localhost:5013"
+# 순서가 곧 샤드 번호 (PROCESSING_SHARD_INDEX), 모든 서비스가 같은 목록을 사용해야 함
+DEFAULT_PROCESSING_SHARDS = "localhost:50051=http://localhost:5003"
+
+
+def parse_shards(spec):
+    shards = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        grpc_target, sep, http_url = entry.partition("=")
+        if not sep or not grpc_target or not http_url:
+            raise ValueError(f"Invalid shard entry (expected grpcHost:port=http://host:port): {entry}")
+        shards.append(Shard(grpc_target.strip(), http_url.strip().rstrip("/")))
+    if not shards:
+        raise ValueError("At least one shard is required")
+    return shards
+
+
+def load_processing_shards():
+    return parse_shards(os.environ.get("PROCESSING_SHARDS", DEFAULT_PROCESSING_SHARDS))
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """consistent hashing ring: key -> 담당 샤드
+
+    샤드마다 가상 노드(replicas개)를 ring에 배치해서 분포를 고르게 하고,
+    샤드가 추가/제거되어도 해당 샤드 구간의 key만 옮겨지도록 한다.
+    key는 문자열로 해싱하므로 approverId는 int/str 어느 쪽으로 넘겨도 같은 샤드가 나온다.
+    """
+
+    def __init__(self, shards, replicas=128):
+        self.shards = list(shards)
+        self._points = []
+        self._owners = []
+        ring = sorted(
+            (_hash(f"{shard.grpc_target}#{i}"), index)
+            for index, shard in enumerate(self.shards)
+            for i in range(replicas)
+        )
+        for point, index in ring:
+            self._points.append(point)
+            self._owners.append(index)
+
+    def index_for(self, key):
+        if len(self.shards) == 1:
+            return 0
+        pos = bisect.bisect(self._points, _hash(str(key))) % len(self._points)
+        return self._owners[pos]
+
+    def shard_for(self, key):
+        return self.shards[self.index_for(key)]
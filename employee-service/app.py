@@ -1,14 +1,34 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_restx import Api, Resource, reqparse, fields
 import pymysql
+import requests
+import threading
+import hashlib
+import json
+import sys
+import os
+
+sys.path.append(os.path.abspath("../common"))
+from ttl_cache import TTLCache
+from db_pool import ConnectionPool, PoolTimeout
+from migrations import migrate, verify_query_plans
 
 app = Flask(__name__)
 api = Api(app)
 
+# --- [목록 조회] 페이지네이션 / 스트리밍 ---
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+STREAM_FETCH_SIZE = 500  # 스트리밍 시 한 번에 읽어서 내보내는 행 수
+EMPLOYEE_COLUMNS = "id, name, department, position"
+
 parser = reqparse.RequestParser()
 parser.add_argument('name', type=str, location='args')
 parser.add_argument('department', type=str, location='args')
 parser.add_argument('position', type=str, location='args')
+parser.add_argument('limit', type=int, location='args', default=DEFAULT_PAGE_SIZE)
+parser.add_argument('cursor', type=int, location='args')
+parser.add_argument('stream', type=str, location='args', choices=('json', 'ndjson'))
 
 employee_model = api.model('Employee', {
     'name': fields.String(required=True, description='Employee Name', example='Kim'),
@@ -16,6 +36,71 @@ employee_model = api.model('Employee', {
     'position': fields.String(required=True, description='Job Position', example='Manager')
 })
 
+bulk_model = api.model('EmployeeBulk', {
+    'employees': fields.List(fields.Nested(employee_model), required=True, description='Employees to create')
+})
+
+MAX_BULK_EMPLOYEES = 10000  # 한 번에 등록 가능한 최대 직원 수
+BULK_INSERT_CHUNK = 500     # multi-row INSERT 한 번(= 트랜잭션 하나)에 넣는 행 수
+
+lookup_model = api.model('EmployeeLookup', {
+    'ids': fields.List(fields.Integer, required=True, description='Employee IDs to look up', example=[1, 2, 3])
+})
+
+MAX_LOOKUP_IDS = 1000  # 한 번에 조회 가능한 최대 ID 개수
+
+# 직원 정보를 캐시하는 서비스들의 무효화 엔드포인트 (생성/수정/삭제 시 호출)
+EMPLOYEE_CHANGE_SUBSCRIBERS = [
+    "http://localhost:5002/internal/employee-cache/invalidate"  # Approval Request Service
+]
+INVALIDATION_TIMEOUT = 2  # 초
+
+# 직원 단건 조회 캐시 { id(int): (직원 dict, ETag) / None(없는 ID) }
+# 다른 인스턴스나 DB 직접 수정은 무효화되지 않으므로 TTL을 짧게 유지
+EMPLOYEE_CACHE_SIZE = 10000
+EMPLOYEE_CACHE_TTL = 60           # 초
+EMPLOYEE_NEGATIVE_CACHE_TTL = 10  # 초
+employee_cache = TTLCache(max_size=EMPLOYEE_CACHE_SIZE, ttl=EMPLOYEE_CACHE_TTL)
+# 무효화될 때마다 증가: 조회 도중 무효화가 일어났으면 조회 결과(변경 전 값)를 캐시에 넣지 않음
+employee_cache_lock = threading.Lock()
+employee_cache_generation = 0
+
+# -- Helper: 직원 변경 알림 (캐시 무효화) --
+# 이 서비스의 캐시는 바로 무효화하고, 다른 서비스에는 응답을 지연시키지 않도록 백그라운드 스레드에서 전송
+# (실패해도 TTL로 결국 만료됨), 여러 ID를 넘기면 구독자마다 한 번의 요청으로 묶어서 전송 (일괄 등록용)
+def notify_employee_changed(*ids):
+    global employee_cache_generation
+    ids = list(ids)
+    with employee_cache_lock:
+        employee_cache_generation += 1
+        employee_cache.invalidate_many(ids)
+
+    def send():
+        for url in EMPLOYEE_CHANGE_SUBSCRIBERS:
+            try:
+                requests.post(url, json={"ids": ids}, timeout=INVALIDATION_TIMEOUT)
+            except Exception as e:
+                print(f"[Cache] Failed to invalidate employees {ids[:10]} at {url}: {e}")
+    threading.Thread(target=send, daemon=True).start()
+
+EMPLOYEE_FIELDS = ('name', 'department', 'position')
+
+# -- Helper: 직원 등록 데이터 검증 (단건 / 일괄 등록 공통), 문제가 없으면 None --
+def validate_employee(data):
+    if not isinstance(data, dict):
+        return "Each employee must be an object."
+    # validate=True는 키의 존재 여부는 확인하지만, 빈 문자열("")은 통과시킬 수 있으므로 추가 검증
+    for field in EMPLOYEE_FIELDS:
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return f"'{field}' field is required and cannot be empty."
+    return None
+
+# --- [설정] DB 커넥션 풀 ---
+DB_POOL_SIZE = 10            # 최대 동시 연결 수
+DB_POOL_WAIT_TIMEOUT = 5     # 커넥션 대기 최대 시간 (초), 초과 시 503
+DB_POOL_MAX_LIFETIME = 1800  # 커넥션 최대 수명 (초), MySQL wait_timeout보다 짧게
+
 # TODO: DB 이름 변경
 def get_db_connection():
     return pymysql.connect(
@@ -24,9 +109,23 @@ def get_db_connection():
         password='password',
         db='classdb',
         charset='utf8mb4',
-        cursorclass=pymysql.cursors.DictCursor # 결과를 dict 형식으로 받음
+        cursorclass=pymysql.cursors.DictCursor, # 결과를 dict 형식으로 받음
+        autocommit=True, # 풀에서 재사용하므로 이전 요청의 트랜잭션(스냅샷)이 남지 않도록
+        connect_timeout=5
     )
 
+# 요청마다 연결(핸드셰이크 + 인증)하지 않고 풀에서 빌려 씀
+db_pool = ConnectionPool(
+    get_db_connection,
+    max_size=DB_POOL_SIZE,
+    wait_timeout=DB_POOL_WAIT_TIMEOUT,
+    max_lifetime=DB_POOL_MAX_LIFETIME
+)
+
+@api.errorhandler(PoolTimeout)
+def handle_pool_timeout(e):
+    return {"message": "Database is busy. Please retry."}, 503
+
 # TODO: 필드 검증 후 INSERT 실행
 @api.route('/employees')
 class EmployeeList(Resource):
@@ -35,65 +134,244 @@ class EmployeeList(Resource):
         data = request.json
 
         # [추가] 3. 수동 검증 로직 (빈 문자열 또는 공백 체크)
-        # validate=True는 키의 존재 여부는 확인하지만, 빈 문자열("")은 통과시킬 수 있으므로 추가 검증
-        if not data.get('name') or not str(data['name']).strip():
-            return {"message": "'name' field is required and cannot be empty."}, 400
-            
-        if not data.get('department') or not str(data['department']).strip():
-            return {"message": "'department' field is required and cannot be empty."}, 400
-            
-        if not data.get('position') or not str(data['position']).strip():
-            return {"message": "'position' field is required and cannot be empty."}, 400
-
-        conn = get_db_connection()
-        with conn.cursor() as cur:
-            sql = "INSERT INTO employees (name, department, position) VALUES (%s, %s, %s)"
-            cur.execute(sql, (data['name'], data['department'], data['position']))
-            conn.commit()
-            id = cur.lastrowid
-        conn.close()
+        error = validate_employee(data)
+        if error:
+            return {"message": error}, 400
+
+        with db_pool.connection() as conn:
+            with conn.cursor() as cur:
+                sql = "INSERT INTO employees (name, department, position) VALUES (%s, %s, %s)"
+                cur.execute(sql, (data['name'], data['department'], data['position']))
+                conn.commit()
+                id = cur.lastrowid
+        notify_employee_changed(id) # 이전에 '없음'으로 캐시된 ID일 수 있음
         return {"id": id}, 201
 
     def get(self):
-        conn = get_db_connection()
+        """직원 목록 조회 (id 오름차순, limit 단위 페이지, 다음 페이지 cursor는 X-Next-Cursor 헤더로 전달)
+
+        stream=json / ndjson 이면 페이지 없이 전체 결과를 서버 측 커서로 읽으면서 바로 응답에 기록
+        """
         args = parser.parse_args()
-        with conn.cursor() as cur:
-            sql = "SELECT * FROM employees WHERE 1=1"
-            params = []
+        sql = f"SELECT {EMPLOYEE_COLUMNS} FROM employees WHERE 1=1"
+        params = []
 
-            if args['name']:
-                sql += " AND name = %s"
-                params.append(args['name'])
+        if args['name']:
+            sql += " AND name = %s"
+            params.append(args['name'])
 
-            if args['department']:
-                sql += " AND department = %s"
-                params.append(args['department'])
+        if args['department']:
+            sql += " AND department = %s"
+            params.append(args['department'])
 
-            if args['position']:
-                sql += " AND position = %s"
-                params.append(args['position'])
+        if args['position']:
+            sql += " AND position = %s"
+            params.append(args['position'])
 
-            cur.execute(sql, tuple(params))
-            result = cur.fetchall()
-        conn.close()
-        ret = []
-        for row in result:
-            ret.append({"id": row['id'], "name": row['name'], "department": row['department'], "position": row['position']})
+        if args['stream']:
+            return stream_employees(sql + " ORDER BY id", tuple(params), args['stream'])
 
-        return ret, 200
+        limit = args['limit']
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            return {"message": f"'limit' must be between 1 and {MAX_PAGE_SIZE}."}, 400
 
-@api.route('/employees/<int:id>')
-class EmployeeDetail(Resource):
-    def get(self, id):
-        conn = get_db_connection()
-        sql = "SELECT * FROM employees WHERE 1=1"
+        # keyset 페이지네이션: 마지막으로 받은 id 다음부터
+        if args['cursor'] is not None:
+            sql += " AND id > %s"
+            params.append(args['cursor'])
+        # 다음 페이지 존재 여부 확인을 위해 limit + 1개 조회
+        sql += " ORDER BY id LIMIT %s"
+        params.append(limit + 1)
+
+        with db_pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, tuple(params))
+                result = cur.fetchall()
+
+        headers = {}
+        if len(result) > limit:
+            result = result[:limit]
+            headers["X-Next-Cursor"] = str(result[-1]['id'])
+        return list(result), 200, headers
+
+# -- Helper: 서버 측 커서(SSDictCursor)로 조회 결과를 JSON 배열 / NDJSON으로 스트리밍 --
+# 행을 모두 메모리에 올리지 않고 STREAM_FETCH_SIZE개씩 읽어서 바로 내보냄
+def stream_employees(sql, params, fmt):
+    conn = db_pool.acquire()  # 커넥션이 없으면 여기서 PoolTimeout(503)
+    state = {"done": False}
+
+    def generate():
+        cur = conn.cursor(pymysql.cursors.SSDictCursor)
+        cur.execute(sql, params)
+        first = True
+        if fmt == 'json':
+            yield "["
+        while True:
+            rows = cur.fetchmany(STREAM_FETCH_SIZE)
+            if not rows:
+                break
+            if fmt == 'json':
+                chunk = ",".join(json.dumps(row, ensure_ascii=False) for row in rows)
+                yield chunk if first else "," + chunk
+            else:
+                yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+            first = False
+        if fmt == 'json':
+            yield "]"
+        cur.close()
+        state["done"] = True
+
+    # 응답이 끝나면(중간에 끊겨도) 커넥션 반납
+    # 결과를 끝까지 읽지 못한 커넥션은 남은 행을 버리는 대신 닫아버림
+    def release():
+        db_pool.release(conn, discard=not state["done"])
+
+    mimetype = 'application/json' if fmt == 'json' else 'application/x-ndjson'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.call_on_close(release)
+    return response
+
+# 여러 직원을 한 번에 등록 (신규 법인 온보딩 등)
+# 행마다 POST /employees와 같은 규칙으로 검증하고, 통과한 행만 BULK_INSERT_CHUNK개씩 multi-row INSERT
+# 응답: 등록된 행의 {index, id} 목록 + 실패한 행의 {index, message} 목록 (index는 요청 배열 기준)
+@api.route('/employees/bulk')
+class EmployeeBulk(Resource):
+    @api.expect(bulk_model)
+    def post(self):
+        employees = (request.json or {}).get('employees')
+        if not isinstance(employees, list):
+            return {"message": "'employees' must be a list."}, 400
+        if len(employees) > MAX_BULK_EMPLOYEES:
+            return {"message": f"At most {MAX_BULK_EMPLOYEES} employees can be created at once."}, 400
+
+        valid = []
+        errors = []
+        for index, data in enumerate(employees):
+            error = validate_employee(data)
+            if error:
+                errors.append({"index": index, "message": error})
+            else:
+                valid.append((index, data))
+
+        created = []
+        db_failed = False
+        if valid:
+            conn = db_pool.acquire()
+            try:
+                for start in range(0, len(valid), BULK_INSERT_CHUNK):
+                    chunk = valid[start:start + BULK_INSERT_CHUNK]
+                    if db_failed:
+                        # 앞 청크에서 DB 오류 -> 나머지는 시도하지 않고 실패로 보고 (재시도 대상)
+                        errors.extend({"index": index, "message": "Not inserted: an earlier chunk hit a database error."}
+                                      for index, _ in chunk)
+                        continue
+                    try:
+                        ids = insert_employees(conn, [data for _, data in chunk])
+                    except (pymysql.err.IntegrityError, pymysql.err.DataError) as e:
+                        # 데이터 문제(길이 초과 등)로 거부된 청크만 실패 처리하고 다음 청크 계속
+                        conn.rollback()
+                        errors.extend({"index": index, "message": f"Rejected by database: {e.args[-1]}"}
+                                      for index, _ in chunk)
+                        continue
+                    except pymysql.err.MySQLError as e:
+                        # 연결 끊김 등: 이미 커밋된 청크는 created로 보고하고 이후 청크는 중단
+                        print(f"[Bulk] Database error after {len(created)} rows: {e}")
+                        db_failed = True
+                        errors.extend({"index": index, "message": f"Database error: {e}"} for index, _ in chunk)
+                        continue
+                    created.extend({"index": index, "id": id} for (index, _), id in zip(chunk, ids))
+            finally:
+                db_pool.release(conn, discard=db_failed)
+
+        errors.sort(key=lambda e: e['index'])
+        if created:
+            notify_employee_changed(*(row['id'] for row in created))
+            print(f"[Bulk] Created {len(created)} employees ({len(errors)} failed)")
+        # 일부라도 등록되면 201 (errors의 index만 다시 보내면 됨), 전부 DB 오류면 503
+        status = 201 if created else (503 if db_failed else 400)
+        return {"created": created, "errors": errors}, status
+
+# -- Helper: 직원 여러 명을 multi-row INSERT 한 번으로 등록하고 부여된 id 목록 반환 --
+# 행 수가 정해진 단일 INSERT는 AUTO_INCREMENT 값을 한 번에 연속으로 할당받으므로
+# lastrowid(첫 행의 id)부터 행 수만큼이 이 문장이 만든 id (auto_increment_increment = 1 기준)
+def insert_employees(conn, rows):
+    values = ", ".join(["(%s, %s, %s)"] * len(rows))
+    params = [data[field] for data in rows for field in EMPLOYEE_FIELDS]
+    conn.begin()
+    with conn.cursor() as cur:
+        cur.execute(f"INSERT INTO employees (name, department, position) VALUES {values}", params)
+        first_id = cur.lastrowid
+    conn.commit()
+    return list(range(first_id, first_id + len(rows)))
+
+# 여러 직원의 존재 여부를 한 번의 쿼리로 확인 (Approval Service의 참여자 검증용)
+@api.route('/employees/lookup')
+class EmployeeLookup(Resource):
+    @api.expect(lookup_model, validate=True)
+    def post(self):
+        ids = request.json.get('ids')
+
+        if not isinstance(ids, list) or not all(type(i) is int for i in ids):
+            return {"message": "'ids' must be a list of integers."}, 400
+
+        ids = list(dict.fromkeys(ids)) # 중복 제거 (순서 유지)
+        if len(ids) > MAX_LOOKUP_IDS:
+            return {"message": f"At most {MAX_LOOKUP_IDS} ids can be looked up at once."}, 400
+        if not ids:
+            return {"employees": [], "missingIds": []}, 200
+
+        placeholders = ", ".join(["%s"] * len(ids))
+        sql = f"SELECT id, name, department, position FROM employees WHERE id IN ({placeholders})"
+        with db_pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, tuple(ids))
+                result = cur.fetchall()
+
+        found = {row['id'] for row in result}
+        return {
+            "employees": result,
+            "missingIds": [i for i in ids if i not in found]
+        }, 200
+
+# -- Helper: 직원 단건 조회 (read-through 캐시), 없는 ID면 None --
+def load_employee(id):
+    cached = employee_cache.get(id, False)
+    if cached is not False:
+        return cached
+
+    generation = employee_cache_generation
+    sql = f"SELECT {EMPLOYEE_COLUMNS}, created_at FROM employees WHERE id = %s"
+    with db_pool.connection() as conn:
         with conn.cursor() as cur:
-            sql += " AND id = %s" # %s 자리 표시자
-            cur.execute(sql, (id))
+            cur.execute(sql, (id,))
             result = cur.fetchone()
-        conn.close()
+
+    if result is None:
+        entry, ttl = None, EMPLOYEE_NEGATIVE_CACHE_TTL
+    else:
         result['created_at'] = str(result['created_at'])
-        return result, 200
+        body = json.dumps(result, sort_keys=True, ensure_ascii=False)
+        entry, ttl = (result, hashlib.md5(body.encode()).hexdigest()), None
+    with employee_cache_lock:
+        if generation == employee_cache_generation:
+            employee_cache.set(id, entry, ttl=ttl)
+    return entry
+
+@api.route('/employees/<int:id>')
+class EmployeeDetail(Resource):
+    def get(self, id):
+        """직원 단건 조회 (ETag 제공, If-None-Match가 일치하면 본문 없이 304)"""
+        entry = load_employee(id)
+        if entry is None:
+            return {"message": f"Employee {id} not found."}, 404
+
+        result, etag = entry
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = jsonify(result)
+        response.set_etag(etag)
+        return response
 
     def put(self, id):
         data = api.payload
@@ -104,28 +382,46 @@ class EmployeeDetail(Resource):
         if not input_keys.issubset(allowed_keys):
             return {"id": id, "message": "400 Bad Request"}, 400
 
-        conn = get_db_connection()
         sql = """
             UPDATE employees
             SET department = %s, position = %s
             WHERE id = %s
         """
-        with conn.cursor() as cur:
-            cur.execute(sql, (data['department'], data['position'], id))
-            conn.commit()
-        cur.close()
+        with db_pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (data['department'], data['position'], id))
+                conn.commit()
+        notify_employee_changed(id)
 
         return 200
 
     def delete(self, id):
-        conn = get_db_connection()
         sql = "DELETE FROM employees WHERE id = %s"
-        with conn.cursor() as cur:
-            cur.execute(sql, (id,))
-            conn.commit()
-        cur.close()
+        with db_pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (id,))
+                conn.commit()
+        notify_employee_changed(id)
 
         return {'message': f"id: {id} DELETE SUCCESS"}, 204
 
+# 직원 단건 조회 캐시 현황 (모니터링용)
+@api.route('/internal/employee-cache')
+class EmployeeCacheStats(Resource):
+    def get(self):
+        """캐시 크기 및 hit/miss 통계"""
+        return employee_cache.stats(), 200
+
+# 커넥션 풀 사용 현황 (모니터링용)
+@api.route('/internal/db-pool')
+class DbPoolStats(Resource):
+    def get(self):
+        return db_pool.stats(), 200
+
 if __name__ == '__main__':
+    # 스키마 마이그레이션 적용 + 검색 쿼리 실행 계획 검증 (인덱스가 없으면 기동 실패)
+    with db_pool.connection() as conn:
+        migrate(conn)
+        verify_query_plans(conn)
+
     app.run(port=5001, debug=True)
\ No newline at end of file
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pymysql
+
+
+class PoolTimeout(Exception):
+    """wait_timeout 안에 커넥션을 얻지 못함 (풀의 모든 커넥션이 사용 중)"""
+
+
+class ConnectionPool:
+    """스레드 간 공유하는 MySQL 커넥션 풀
+
+    - 최대 max_size개까지만 연결을 열고, 모두 사용 중이면 wait_timeout초까지 반납을 기다림
+    - 꺼낼 때 validate_after초 이상 쉬고 있던 커넥션은 ping으로 확인 (끊겼으면 새로 연결)
+    - 연결한 지 max_lifetime초가 지난 커넥션은 폐기하고 새로 연결 (서버 wait_timeout / 장애 조치 대비)
+    - 가장 최근에 반납된 커넥션부터 재사용 (LIFO -> 오래 쉰 커넥션은 자연스럽게 만료)
+    """
+
+    def __init__(self, connect, max_size=10, wait_timeout=5.0, max_lifetime=1800, validate_after=1.0):
+        self._connect = connect  # connect() -> pymysql Connection
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+        self.max_lifetime = max_lifetime
+        self.validate_after = validate_after
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = deque()   # (conn, created_at, last_used)
+        self._born = {}        # id(conn) -> created_at (사용 중인 커넥션)
+        self._size = 0         # 열려 있는(또는 여는 중인) 커넥션 수 = idle + 사용 중
+        self._waiting = 0
+
+        # 사용량 지표
+        self.acquired = 0
+        self.timeouts = 0
+        self.created = 0
+        self.closed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # -- Helper: 커넥션 닫기 (이미 끊긴 커넥션이면 예외 무시) --
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self.closed += 1
+
+    def _open(self):
+        conn = self._connect()
+        with self._lock:
+            self.created += 1
+        return conn, time.monotonic()
+
+    def _checkout(self, entry):
+        # 락 밖에서 호출: idle 커넥션 검사 (만료 / 끊김이면 새로 연결)
+        if entry is None:
+            return self._open()
+        conn, created_at, last_used = entry
+        now = time.monotonic()
+        if now - created_at > self.max_lifetime:
+            self._close(conn)
+            return self._open()
+        if now - last_used > self.validate_after:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                self._close(conn)
+                return self._open()
+        return conn, created_at
+
+    def acquire(self, timeout=None):
+        """커넥션 대여 (반드시 release로 반납), timeout 초과 시 PoolTimeout"""
+        started = time.monotonic()
+        deadline = started + (self.wait_timeout if timeout is None else timeout)
+        with self._lock:
+            self._waiting += 1
+            try:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f"No database connection available within {deadline - started:.1f}s")
+                    self._available.wait(remaining)
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    entry = None
+                    self._size += 1  # 새로 열 자리 예약
+            finally:
+                self._waiting -= 1
+
+        try:
+            conn, created_at = self._checkout(entry)
+        except Exception:
+            # 연결 실패: 예약한 자리를 돌려주고 대기 중인 스레드 깨움
+            with self._lock:
+                self._size -= 1
+                self._available.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._born[id(conn)] = created_at
+            self.acquired += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def release(self, conn, discard=False):
+        """커넥션 반납, discard=True거나 수명이 지났으면 닫고 자리만 반납"""
+        now = time.monotonic()
+        with self._lock:
+            created_at = self._born.pop(id(conn))
+            keep = not discard and now - created_at <= self.max_lifetime
+            if keep:
+                self._idle.append((conn, created_at, now))
+            else:
+                self._size -= 1
+            self._available.notify()
+        if not keep:
+            self._close(conn)
+
+    @contextmanager
+    def connection(self):
+        """with db_pool.connection() as conn: ... (블록이 끝나면 자동 반납)"""
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            discard = True  # 연결 자체의 오류 -> 재사용하지 않음
+            raise
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "maxSize": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "inUse": self._size - len(self._idle),
+                "waiting": self._waiting,
+                "acquired": self.acquired,
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "closed": self.closed,
+                "avgWaitMs": round(self._wait_total / self.acquired * 1000, 2) if self.acquired else 0.0,
+                "maxWaitMs": round(self._wait_max * 1000, 2)
+            }
+
+    def close(self):
+        # idle 커넥션 정리 (사용 중인 커넥션은 반납 시 그대로 idle로 돌아감)
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn, _, _ in idle:
+            self._close(conn)
@@ -0,0 +1,125 @@
+import pymysql
+
+# --- [마이그레이션 정의] employees 스키마 ---
+# (version, 설명, [SQL, ...]) 순서대로 한 번씩만 적용, 적용된 버전은 schema_migrations에 기록
+# 이미 적용된 항목은 수정하지 말고 새 버전을 추가할 것
+MIGRATIONS = [
+    (1, "create employees table", [
+        """
+        CREATE TABLE IF NOT EXISTS employees (
+            id BIGINT PRIMARY KEY AUTO_INCREMENT,
+            name VARCHAR(100) NOT NULL,
+            department VARCHAR(100) NOT NULL,
+            position VARCHAR(100) NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    ]),
+    # 직원 검색 필터(name / department / position 조합)용 인덱스
+    # InnoDB 보조 인덱스에는 PK(id)가 포함되므로 필터 + ORDER BY id도 인덱스로 처리됨
+    (2, "indexes for employee search filters", [
+        "CREATE INDEX idx_employees_name ON employees (name)",
+        "CREATE INDEX idx_employees_department_position ON employees (department, position)",
+        "CREATE INDEX idx_employees_position ON employees (position)",
+    ]),
+]
+
+MIGRATION_LOCK = "employee_service_migrations"
+MIGRATION_LOCK_TIMEOUT = 30  # 초
+ER_DUP_KEYNAME = 1061  # 같은 이름의 인덱스가 이미 있음
+
+
+def _execute(cur, sql):
+    try:
+        cur.execute(sql)
+    except pymysql.err.OperationalError as e:
+        # DDL은 자동 커밋되므로 기록 전에 중단된 경우 인덱스만 남아 있을 수 있음 -> 이미 있으면 통과
+        if e.args[0] != ER_DUP_KEYNAME:
+            raise
+
+
+def migrate(conn):
+    """아직 적용되지 않은 마이그레이션 적용, 적용한 버전 목록 반환
+
+    여러 프로세스가 동시에 기동해도 한 곳에서만 적용하도록 GET_LOCK으로 직렬화
+    """
+    applied = []
+    with conn.cursor() as cur:
+        cur.execute("SELECT GET_LOCK(%s, %s) AS locked", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+        if not cur.fetchone()['locked']:
+            raise RuntimeError("Timed out waiting for the schema migration lock")
+        try:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(200) NOT NULL,
+                    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cur.execute("SELECT version FROM schema_migrations")
+            done = {row['version'] for row in cur.fetchall()}
+
+            for version, description, statements in MIGRATIONS:
+                if version in done:
+                    continue
+                for sql in statements:
+                    _execute(cur, sql)
+                cur.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                            (version, description))
+                conn.commit()
+                applied.append(version)
+                print(f"[Migration] Applied {version}: {description}")
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+
+    current = MIGRATIONS[-1][0]
+    print(f"[Migration] Schema is at version {current}" + ("" if applied else " (up to date)"))
+    return applied
+
+
+# 직원 검색에서 실행되는 쿼리 (EmployeeList.get이 만드는 형태와 동일): (이름, SQL, 파라미터)
+def search_queries():
+    base = "SELECT id, name, department, position FROM employees WHERE 1=1"
+    return [
+        ("search by name", base + " AND name = %s", ("x",)),
+        ("search by department", base + " AND department = %s", ("x",)),
+        ("search by position", base + " AND position = %s", ("x",)),
+        ("search by department, position", base + " AND department = %s AND position = %s", ("x", "x")),
+        ("search by name, department", base + " AND name = %s AND department = %s", ("x", "x")),
+        ("search by name, department, position",
+         base + " AND name = %s AND department = %s AND position = %s", ("x", "x", "x")),
+        ("search by department, next page",
+         base + " AND department = %s AND id > %s ORDER BY id LIMIT 101", ("x", 0)),
+    ]
+
+
+def verify_query_plans(conn):
+    """검색 쿼리 중 사용할 수 있는 인덱스가 없는(전체 스캔만 가능한) 것이 있으면 RuntimeError 발생
+
+    행 수가 적으면 옵티마이저가 인덱스가 있어도 전체 스캔을 고를 수 있으므로
+    실제 선택(type/key)은 로그로만 남기고, 판단은 possible_keys 기준으로 한다
+    """
+    offenders = []
+    with conn.cursor() as cur:
+        for name, sql, params in search_queries():
+            cur.execute("EXPLAIN " + sql, params)
+            plan = cur.fetchone()
+            if not plan.get('possible_keys'):
+                offenders.append(f"{name} (type={plan.get('type')})")
+            else:
+                print(f"[Migration] {name}: type={plan.get('type')}, key={plan.get('key')}")
+
+    if offenders:
+        raise RuntimeError("Employee search queries have no usable index: " + "; ".join(offenders))
+    print("[Migration] Query plan check passed (all search filters are indexed)")
+
+
+if __name__ == '__main__':
+    # 단독 실행: 마이그레이션 적용 + 실행 계획 검증
+    from app import get_db_connection
+    conn = get_db_connection()
+    try:
+        migrate(conn)
+        verify_query_plans(conn)
+    finally:
+        conn.close()
@@ -75,7 +75,7 @@ def process_approval(approver_id, req_id, status):
 
     # 처리 요청
     res = requests.post(f"{PROC_URL}/{approver_id}/{req_id}", json={"status": status})
-    if res.status_code == 200:
+    if res.status_code in (200, 202):
         print(f"   [Success] Approver {approver_id} processed as '{status}'")
         return True
     return False
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14proto/approval.proto\x12\x08\x61pproval\"8\n\x04Step\x12\x0c\n\x04step\x18\x01 \x01(\x05\x12\x12\n\napproverId\x18\x02 \x01(\x05\x12\x0e\n\x06status\x18\x03 \x01(\t\"x\n\x0f\x41pprovalRequest\x12\x11\n\trequestId\x18\x01 \x01(\x05\x12\x13\n\x0brequesterId\x18\x02 \x01(\x05\x12\r\n\x05title\x18\x03 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x04 \x01(\t\x12\x1d\n\x05steps\x18\x05 \x03(\x0b\x32\x0e.approval.Step\"\"\n\x10\x41pprovalResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\"\\\n\x15\x41pprovalResultRequest\x12\x11\n\trequestId\x18\x01 \x01(\x05\x12\x0c\n\x04step\x18\x02 \x01(\x05\x12\x12\n\napproverId\x18\x03 \x01(\x05\x12\x0e\n\x06status\x18\x04 \x01(\t\"(\n\x16\x41pprovalResultResponse\x12\x0e\n\x06status\x18\x01 \x01(\t2\xaf\x01\n\x08\x41pproval\x12H\n\x0fRequestApproval\x12\x19.approval.ApprovalRequest\x1a\x1a.approval.ApprovalResponse\x12Y\n\x14ReturnApprovalResult\x12\x1f.approval.ApprovalResultRequest\x1a .approval.ApprovalResultResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14proto/approval.proto\x12\x08\x61pproval\"8\n\x04Step\x12\x0c\n\x04step\x18\x01 \x01(\x05\x12\x12\n\napproverId\x18\x02 \x01(\x05\x12\x0e\n\x06status\x18\x03 \x01(\t\"x\n\x0f\x41pprovalRequest\x12\x11\n\trequestId\x18\x01 \x01(\x05\x12\x13\n\x0brequesterId\x18\x02 \x01(\x05\x12\r\n\x05title\x18\x03 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x04 \x01(\t\x12\x1d\n\x05steps\x18\x05 \x03(\x0b\x32\x0e.approval.Step\"\"\n\x10\x41pprovalResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\"M\n\x16\x41\x64vanceApprovalRequest\x12\x11\n\trequestId\x18\x01 \x01(\x05\x12\x0c\n\x04step\x18\x02 \x01(\x05\x12\x12\n\napproverId\x18\x03 \x01(\x05\"\\\n\x15\x41pprovalResultRequest\x12\x11\n\trequestId\x18\x01 \x01(\x05\x12\x0c\n\x04step\x18\x02 \x01(\x05\x12\x12\n\napproverId\x18\x03 \x01(\x05\x12\x0e\n\x06status\x18\x04 \x01(\t\"(\n\x16\x41pprovalResultResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\"G\n\x13\x41pprovalResultBatch\x12\x30\n\x07results\x18\x01 \x03(\x0b\x32\x1f.approval.ApprovalResultRequest\"H\n\x15\x41pprovalResultOutcome\x12\x11\n\trequestId\x18\x01 \x01(\x05\x12\x0c\n\x04step\x18\x02 \x01(\x05\x12\x0e\n\x06status\x18\x03 \x01(\t\"O\n\x1b\x41pprovalResultBatchResponse\x12\x30\n\x07results\x18\x01 \x03(\x0b\x32\x1f.approval.ApprovalResultOutcome\"R\n\x17\x41pprovalRequestEnvelope\x12\x0b\n\x03seq\x18\x01 \x01(\x03\x12*\n\x07request\x18\x02 \x01(\x0b\x32\x19.approval.ApprovalRequest\"V\n\x16\x41pprovalResultEnvelope\x12\x0b\n\x03seq\x18\x01 \x01(\x03\x12/\n\x06result\x18\x02 \x01(\x0b\x32\x1f.approval.ApprovalResultRequest\"(\n\tStreamAck\x12\x0b\n\x03seq\x18\x01 \x01(\x03\x12\x0e\n\x06status\x18\x02 \x01(\t2\x89\x04\n\x08\x41pproval\x12H\n\x0fRequestApproval\x12\x19.approval.ApprovalRequest\x1a\x1a.approval.ApprovalResponse\x12Y\n\x14ReturnApprovalResult\x12\x1f.approval.ApprovalResultRequest\x1a .approval.ApprovalResultResponse\x12]\n\x15ReturnApprovalResults\x12\x1d.approval.ApprovalResultBatch\x1a%.approval.ApprovalResultBatchResponse\x12T\n\x16StreamApprovalRequests\x12!.approval.ApprovalRequestEnvelope\x1a\x13.approval.StreamAck(\x01\x30\x01\x12R\n\x15StreamApprovalResults\x12 .approval.ApprovalResultEnvelope\x1a\x13.approval.StreamAck(\x01\x30\x01\x12O\n\x0f\x41\x64vanceApproval\x12 .approval.AdvanceApprovalRequest\x1a\x1a.approval.ApprovalResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -37,10 +37,24 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_APPROVALREQUEST']._serialized_end=212
   _globals['_APPROVALRESPONSE']._serialized_start=214
   _globals['_APPROVALRESPONSE']._serialized_end=248
-  _globals['_APPROVALRESULTREQUEST']._serialized_start=250
-  _globals['_APPROVALRESULTREQUEST']._serialized_end=342
-  _globals['_APPROVALRESULTRESPONSE']._serialized_start=344
-  _globals['_APPROVALRESULTRESPONSE']._serialized_end=384
-  _globals['_APPROVAL']._serialized_start=387
-  _globals['_APPROVAL']._serialized_end=562
+  _globals['_ADVANCEAPPROVALREQUEST']._serialized_start=250
+  _globals['_ADVANCEAPPROVALREQUEST']._serialized_end=327
+  _globals['_APPROVALRESULTREQUEST']._serialized_start=329
+  _globals['_APPROVALRESULTREQUEST']._serialized_end=421
+  _globals['_APPROVALRESULTRESPONSE']._serialized_start=423
+  _globals['_APPROVALRESULTRESPONSE']._serialized_end=463
+  _globals['_APPROVALRESULTBATCH']._serialized_start=465
+  _globals['_APPROVALRESULTBATCH']._serialized_end=536
+  _globals['_APPROVALRESULTOUTCOME']._serialized_start=538
+  _globals['_APPROVALRESULTOUTCOME']._serialized_end=610
+  _globals['_APPROVALRESULTBATCHRESPONSE']._serialized_start=612
+  _globals['_APPROVALRESULTBATCHRESPONSE']._serialized_end=691
+  _globals['_APPROVALREQUESTENVELOPE']._serialized_start=693
+  _globals['_APPROVALREQUESTENVELOPE']._serialized_end=775
+  _globals['_APPROVALRESULTENVELOPE']._serialized_start=777
+  _globals['_APPROVALRESULTENVELOPE']._serialized_end=863
+  _globals['_STREAMACK']._serialized_start=865
+  _globals['_STREAMACK']._serialized_end=905
+  _globals['_APPROVAL']._serialized_start=908
+  _globals['_APPROVAL']._serialized_end=1429
 # @@protoc_insertion_point(module_scope)
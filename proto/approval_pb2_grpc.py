@@ -45,6 +45,26 @@ class ApprovalStub(object):
                 request_serializer=proto_dot_approval__pb2.ApprovalResultRequest.SerializeToString,
                 response_deserializer=proto_dot_approval__pb2.ApprovalResultResponse.FromString,
                 _registered_method=True)
+        self.ReturnApprovalResults = channel.unary_unary(
+                '/approval.Approval/ReturnApprovalResults',
+                request_serializer=proto_dot_approval__pb2.ApprovalResultBatch.SerializeToString,
+                response_deserializer=proto_dot_approval__pb2.ApprovalResultBatchResponse.FromString,
+                _registered_method=True)
+        self.StreamApprovalRequests = channel.stream_stream(
+                '/approval.Approval/StreamApprovalRequests',
+                request_serializer=proto_dot_approval__pb2.ApprovalRequestEnvelope.SerializeToString,
+                response_deserializer=proto_dot_approval__pb2.StreamAck.FromString,
+                _registered_method=True)
+        self.StreamApprovalResults = channel.stream_stream(
+                '/approval.Approval/StreamApprovalResults',
+                request_serializer=proto_dot_approval__pb2.ApprovalResultEnvelope.SerializeToString,
+                response_deserializer=proto_dot_approval__pb2.StreamAck.FromString,
+                _registered_method=True)
+        self.AdvanceApproval = channel.unary_unary(
+                '/approval.Approval/AdvanceApproval',
+                request_serializer=proto_dot_approval__pb2.AdvanceApprovalRequest.SerializeToString,
+                response_deserializer=proto_dot_approval__pb2.ApprovalResponse.FromString,
+                _registered_method=True)
 
 
 class ApprovalServicer(object):
@@ -65,6 +85,35 @@ class ApprovalServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ReturnApprovalResults(self, request, context):
+        """3. [Processing Service -> Request Service] 결재 결과 일괄 반환 (항목별 처리 결과 포함)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamApprovalRequests(self, request_iterator, context):
+        """4. [Request Service -> Processing Service] 결재 요청 스트림 (장기 연결, 메시지별 ack)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamApprovalResults(self, request_iterator, context):
+        """5. [Processing Service -> Request Service] 결재 결과 스트림 (장기 연결, 메시지별 ack)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AdvanceApproval(self, request, context):
+        """6. [Request Service -> Processing Service] 다음 단계로 진행 (본문 없이 단계 정보만 전달)
+        Processing Service에 캐시된 본문이 없으면 status "cache_miss" -> RequestApproval로 전체 전송
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ApprovalServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -78,6 +127,26 @@ def add_ApprovalServicer_to_server(servicer, server):
                     request_deserializer=proto_dot_approval__pb2.ApprovalResultRequest.FromString,
                     response_serializer=proto_dot_approval__pb2.ApprovalResultResponse.SerializeToString,
             ),
+            'ReturnApprovalResults': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReturnApprovalResults,
+                    request_deserializer=proto_dot_approval__pb2.ApprovalResultBatch.FromString,
+                    response_serializer=proto_dot_approval__pb2.ApprovalResultBatchResponse.SerializeToString,
+            ),
+            'StreamApprovalRequests': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamApprovalRequests,
+                    request_deserializer=proto_dot_approval__pb2.ApprovalRequestEnvelope.FromString,
+                    response_serializer=proto_dot_approval__pb2.StreamAck.SerializeToString,
+            ),
+            'StreamApprovalResults': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamApprovalResults,
+                    request_deserializer=proto_dot_approval__pb2.ApprovalResultEnvelope.FromString,
+                    response_serializer=proto_dot_approval__pb2.StreamAck.SerializeToString,
+            ),
+            'AdvanceApproval': grpc.unary_unary_rpc_method_handler(
+                    servicer.AdvanceApproval,
+                    request_deserializer=proto_dot_approval__pb2.AdvanceApprovalRequest.FromString,
+                    response_serializer=proto_dot_approval__pb2.ApprovalResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'approval.Approval', rpc_method_handlers)
@@ -143,3 +212,111 @@ class Approval(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def ReturnApprovalResults(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/approval.Approval/ReturnApprovalResults',
+            proto_dot_approval__pb2.ApprovalResultBatch.SerializeToString,
+            proto_dot_approval__pb2.ApprovalResultBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamApprovalRequests(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/approval.Approval/StreamApprovalRequests',
+            proto_dot_approval__pb2.ApprovalRequestEnvelope.SerializeToString,
+            proto_dot_approval__pb2.StreamAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamApprovalResults(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/approval.Approval/StreamApprovalResults',
+            proto_dot_approval__pb2.ApprovalResultEnvelope.SerializeToString,
+            proto_dot_approval__pb2.StreamAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AdvanceApproval(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/approval.Approval/AdvanceApproval',
+            proto_dot_approval__pb2.AdvanceApprovalRequest.SerializeToString,
+            proto_dot_approval__pb2.ApprovalResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import grpc
+
+# [설정] gRPC 서버 방식(thread / aio) 비교 벤치마크
+# 각 방식으로 서비스를 띄운 뒤 동일한 부하(unary RPC, 동시 요청 N개)를 보내서 처리량/지연 시간 비교
+# 사용법:
+#   python scripts/bench_grpc_modes.py                      # Processing Service: RequestApproval
+#   python scripts/bench_grpc_modes.py --service request    # Request Service: ReturnApprovalResult (MongoDB 필요)
+# 벤치마크 중에는 해당 서비스의 기본 포트(50051/5003 또는 50052/5002)가 비어 있어야 함
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(ROOT, "proto"))
+import approval_pb2
+import approval_pb2_grpc
+
+SERVICES = {
+    "processing": {"dir": "approval-processing-service", "target": "localhost:50051"},
+    "request": {"dir": "approval-request-service", "target": "localhost:50052"},
+}
+MODES = ("thread", "aio")
+
+
+def make_call(service, stub, i):
+    if service == "processing":
+        return stub.RequestApproval(approval_pb2.ApprovalRequest(
+            requestId=10_000_000 + i, requesterId=1, title="bench", content="bench",
+            steps=[approval_pb2.Step(step=1, approverId=random.randint(1, 1000), status="pending")]
+        ))
+    # 존재하지 않는 requestId -> MongoDB 갱신 시도 + 존재 확인 (DB 왕복 2회)
+    return stub.ReturnApprovalResult(approval_pb2.ApprovalResultRequest(
+        requestId=2_000_000_000 + i, step=1, approverId=1, status="approved"
+    ))
+
+
+async def run_load(service, target, total, concurrency):
+    latencies = []
+    errors = 0
+    next_index = iter(range(total))
+
+    async with grpc.aio.insecure_channel(target) as channel:
+        stub = approval_pb2_grpc.ApprovalStub(channel)
+        await asyncio.wait_for(channel.channel_ready(), timeout=30)
+
+        async def worker():
+            nonlocal errors
+            for i in next_index:
+                started = time.perf_counter()
+                try:
+                    await make_call(service, stub, i)
+                    latencies.append(time.perf_counter() - started)
+                except grpc.aio.AioRpcError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pick = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000 if latencies else 0.0
+    return {"rps": len(latencies) / elapsed, "p50": pick(0.5), "p99": pick(0.99), "errors": errors}
+
+
+def bench_mode(service, mode, total, concurrency):
+    spec = SERVICES[service]
+    with tempfile.TemporaryDirectory() as data_dir:
+        # 벤치마크 데이터가 실제 대기열(./data)에 섞이지 않도록 임시 디렉터리 사용
+        env = dict(os.environ, GRPC_SERVER_MODE=mode, QUEUE_DATA_DIR=data_dir)
+        proc = subprocess.Popen([sys.executable, "app.py"], cwd=os.path.join(ROOT, spec["dir"]), env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            return asyncio.run(run_load(service, spec["target"], total, concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare thread vs grpc.aio server modes")
+    parser.add_argument("--service", choices=sorted(SERVICES), default="processing")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{args.service} service: {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'mode':<8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for mode in MODES:
+        r = bench_mode(args.service, mode, args.requests, args.concurrency)
+        print(f"{mode:<8}{r['rps']:>10.0f}{r['p50']:>10.1f}{r['p99']:>10.1f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import time
 # [설정] 환경 변수 및 접속 정보
 # 1. 서비스 URL
 EMP_API_URL = "http://localhost:5001/employees"
+EMP_BULK_URL = f"{EMP_API_URL}/bulk"
 
 # 2. MySQL (Employee Service DB)
 MYSQL_CONFIG = {
@@ -62,24 +63,30 @@ def seed_employees():
         {"name": "박이사", "department": "인사팀", "position": "이사"}    # 예상 ID: 3
     ]
     
-    headers = {"Content-Type": "application/json"}
-    
-    for idx, user in enumerate(users, start=1):
-        try:
-            res = requests.post(EMP_API_URL, json=user, headers=headers)
-            if res.status_code == 201:
-                created_id = res.json()['id']
-                print(f"직원 생성 성공: ID {created_id} ({user['name']} / {user['position']})")
-                
-                # ID 순서 검증
-                if created_id != idx:
-                    print(f" 경고: 예상 ID({idx})와 실제 ID({created_id})가 다릅니다.")
-            else:
-                print(f"생성 실패: {res.text}")
-                return False
-        except requests.exceptions.ConnectionError:
-            print("[오류] Employee Service가 켜져 있지 않습니다!")
-            return False
+    # 건별 POST 대신 일괄 등록 API로 한 번에 생성 (요청 배열 순서대로 id 부여)
+    try:
+        res = requests.post(EMP_BULK_URL, json={"employees": users})
+    except requests.exceptions.ConnectionError:
+        print("[오류] Employee Service가 켜져 있지 않습니다!")
+        return False
+
+    if res.status_code != 201:
+        print(f"생성 실패: {res.text}")
+        return False
+
+    body = res.json()
+    for error in body['errors']:
+        print(f"생성 실패: {users[error['index']]['name']} - {error['message']}")
+    for row in body['created']:
+        user = users[row['index']]
+        print(f"직원 생성 성공: ID {row['id']} ({user['name']} / {user['position']})")
+
+        # ID 순서 검증
+        if row['id'] != row['index'] + 1:
+            print(f" 경고: 예상 ID({row['index'] + 1})와 실제 ID({row['id']})가 다릅니다.")
+
+    if body['errors']:
+        return False
             
     return True
 
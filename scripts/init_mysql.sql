@@ -1,6 +1,8 @@
 CREATE DATABASE IF NOT EXISTS classdb;
 USE classdb;
 
+-- 인덱스 및 이후 스키마 변경은 employee-service/migrations.py가 관리 (서비스 기동 시 자동 적용)
+
 CREATE TABLE IF NOT EXISTS employees (
     id BIGINT PRIMARY KEY AUTO_INCREMENT,
     name VARCHAR(100) NOT NULL,
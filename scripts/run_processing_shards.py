@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+# [설정] 로컬에서 Processing Service 샤드 N개 실행
+# 사용법: python scripts/run_processing_shards.py 3
+# 샤드 i: gRPC 50051 + 10*i, REST 5003 + 10*i
+# 출력되는 PROCESSING_SHARDS 값을 Request Service 실행 시에도 똑같이 지정해야 함
+BASE_GRPC_PORT = 50051
+BASE_HTTP_PORT = 5003
+PORT_STEP = 10
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "approval-processing-service")
+
+
+def shard_spec(count):
+    return ",".join(
+        f"localhost:{BASE_GRPC_PORT + PORT_STEP * i}=http://localhost:{BASE_HTTP_PORT + PORT_STEP * i}"
+        for i in range(count)
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    spec = shard_spec(count)
+    print(f"PROCESSING_SHARDS={spec}")
+
+    procs = []
+    for i in range(count):
+        env = dict(os.environ, PROCESSING_SHARDS=spec, PROCESSING_SHARD_INDEX=str(i))
+        procs.append(subprocess.Popen([sys.executable, "app.py"], cwd=SERVICE_DIR, env=env))
+
+    try:
+        for p in procs:
+            p.wait()
+    except KeyboardInterrupt:
+        print("\nStopping shards...")
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+
+
+if __name__ == "__main__":
+    main()
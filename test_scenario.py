@@ -93,7 +93,7 @@ def run_test():
         process_data = {"status": "approved"}
         res = requests.post(f"{PROC_URL}/process/2/{target_req_id}", json=process_data)
         
-        if res.status_code == 200:
+        if res.status_code in (200, 202):
             print(f"Processing Result: {res.json()}")
         else:
             print(f"Error: {res.text}")
@@ -120,7 +120,7 @@ def run_test():
         
         res = requests.post(f"{PROC_URL}/process/2/{target_req_id}", json=process_data)
         
-        if res.status_code == 200:
+        if res.status_code in (200, 202):
             print_success("승인 처리 완료!")
             print_json("결과", res.json())
         else:
@@ -121,7 +121,7 @@ def process_approval(approver_id, request_id, status="approved"):
         # 가이드 URI: /process/{approverId}/{requestId} 
         res = requests.post(f"{PROCESSING_URL}/{approver_id}/{request_id}", json=payload)
         
-        if res.status_code == 200:
+        if res.status_code in (200, 202):
             print(f"ㄴ 처리 성공: {res.json()}")
         else:
             print(f"ㄴ 처리 실패: {res.status_code} {res.text}")